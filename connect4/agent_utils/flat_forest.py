@@ -0,0 +1,152 @@
+"""
+Flattened random forest for fast batch prediction.
+
+    python -m connect4.agent_utils.flat_forest --out connect4/models/ml_agent_forest.npz
+
+sklearn's RandomForestClassifier.predict_proba walks each tree in its own
+call and dispatches the trees through joblib, which costs milliseconds even
+for the handful of boards ml_agent scores per move. export_forest copies
+every tree into one set of contiguous arrays, with child indices offset so
+all trees share a single node numbering. FlatForest.predict_proba then
+walks all (sample, tree) pairs one level per step with NumPy fancy
+indexing. Leaves point at themselves, so the walk stops changing once
+every pair has reached a leaf. The result matches sklearn's to floating
+point tolerance.
+"""
+import time
+import weakref
+import argparse
+import numpy as np
+
+
+class FlatForest:
+    """
+    A random forest as flat arrays:
+
+        feature    int32  (nodes,)           feature tested at each split (0 at leaves)
+        threshold  float64 (nodes,)          go left when x[feature] <= threshold
+        left       int32  (nodes,)           left child, the node itself at leaves
+        right      int32  (nodes,)           right child, the node itself at leaves
+        value      float64 (nodes, classes)  class probabilities of each node
+        roots      int32  (trees,)           root node of each tree
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Leaf index reached by every sample in every tree, shape (samples, trees)."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            if np.array_equal(children, nodes):
+                break
+            nodes = children
+        return nodes
+
+    def predict_proba(self, X):
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, path):
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 value=self.value, roots=self.roots, classes=self.classes_, max_depth=self.max_depth)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+                       arrays["value"], arrays["roots"], arrays["classes"], arrays["max_depth"])
+
+
+def export_forest(model):
+    """Flattens a fitted RandomForestClassifier (or anything with estimators_ of decision trees)."""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        count = tree.node_count
+        index = np.arange(offset, offset + count, dtype=np.int32)
+        is_leaf = tree.children_left < 0
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, index, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, index, tree.children_right + offset).astype(np.int32))
+        # Weighted counts in older sklearn, fractions in newer; normalise either way
+        value = tree.value[:, 0, :].astype(np.float64)
+        values.append(value / value.sum(axis=1, keepdims=True))
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += count
+    return FlatForest(
+        np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts), np.concatenate(rights),
+        np.concatenate(values), np.array(roots, dtype=np.int32), np.asarray(model.classes_), max_depth,
+    )
+
+
+# Flattened copies of the models ml_agent has been handed, dropped with the model
+_flat_models = weakref.WeakKeyDictionary()
+
+
+def flat_model(model):
+    """
+    The flattened form of `model`, exported on first use. Models that are
+    not tree ensembles (or are already flat) are returned unchanged.
+    """
+    if isinstance(model, FlatForest) or not hasattr(model, "estimators_"):
+        return model
+    flat = _flat_models.get(model)
+    if flat is None:
+        flat = export_forest(model)
+        _flat_models[model] = flat
+    return flat
+
+
+def main(argv=None):
+    from connect4.agent_utils.ml_agent import load_or_train_model, encode_boards
+    from connect4.benchmark import build_corpus
+
+    parser = argparse.ArgumentParser(description="Flatten the ml_agent forest and compare it with sklearn.")
+    parser.add_argument("--out", default=None, help="also save the flat arrays here (.npz)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    model = load_or_train_model()
+    start = time.perf_counter()
+    flat = export_forest(model)
+    print(f"Exported {flat.n_trees} trees, {len(flat.feature)} nodes in {time.perf_counter() - start:.2f}s")
+    if args.out:
+        flat.save(args.out)
+
+    # Seven boards, as ml_agent scores per move
+    corpus = [board for _, board, _ in build_corpus()]
+    batch = encode_boards(corpus[:7])
+    error = np.abs(flat.predict_proba(encode_boards(corpus)) - model.predict_proba(encode_boards(corpus))).max()
+    print(f"Max probability difference over {len(corpus)} boards: {error:.2e}")
+    for name, predict in (("sklearn", model.predict_proba), ("flat", flat.predict_proba)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            predict(batch)
+        print(f"{name:>8}: {(time.perf_counter() - start) / args.repeat * 1000:.2f} ms per 7-board batch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from connect4.bitboard import COLUMN_COUNT, COLUMN_HEIGHT, ROW_COUNT, Position
+from connect4.lines import CELL_WINDOWS_4, SCORE_4, WINDOWS_4
+
+# ================================
+# Incremental Window Evaluation
+# ================================
+# Each window's base-3 code (see connect4.lines) and each side's total score
+# are kept up to date on play/undo, so a leaf evaluation is a lookup instead
+# of a scan over all 69 windows.
+
+
+def _bit_windows():
+    cells = [()] * (COLUMN_COUNT * COLUMN_HEIGHT)
+    for col in range(COLUMN_COUNT):
+        for height in range(ROW_COUNT):
+            row = ROW_COUNT - 1 - height
+            cells[col * COLUMN_HEIGHT + height] = CELL_WINDOWS_4[row * COLUMN_COUNT + col]
+    return tuple(cells)
+
+
+# (window number, place value) pairs through each bitboard bit index
+CELL_WINDOWS = _bit_windows()
+
+
+class ScoredPosition(Position):
+    """
+    Position that keeps evaluate_board's score for both pieces up to date as
+    moves are played and undone.
+    """
+
+    __slots__ = ("codes", "scores")
+
+    def __init__(self):
+        super().__init__()
+        self.codes = [0] * len(WINDOWS_4)
+        self.scores = [0, 0]
+
+    @classmethod
+    def from_position(cls, pos):
+        scored = cls()
+        for col in range(COLUMN_COUNT):
+            for height in range(pos.heights[col]):
+                bit = 1 << (col * COLUMN_HEIGHT + height)
+                scored.play(col, 1 if pos.boards[0] & bit else 2)
+        return scored
+
+    def copy(self):
+        pos = super().copy()
+        pos.codes = self.codes[:]
+        pos.scores = self.scores[:]
+        return pos
+
+    def score(self, piece):
+        return self.scores[piece - 1]
+
+    def _update(self, index, amount):
+        codes = self.codes
+        scores_1, scores_2 = SCORE_4
+        delta_1 = delta_2 = 0
+        for window, place in CELL_WINDOWS[index]:
+            old = codes[window]
+            new = old + amount * place
+            codes[window] = new
+            delta_1 += scores_1[new] - scores_1[old]
+            delta_2 += scores_2[new] - scores_2[old]
+        self.scores[0] += delta_1
+        self.scores[1] += delta_2
+
+    def play(self, col, piece):
+        row = super().play(col, piece)
+        if row != -1:
+            self._update(col * COLUMN_HEIGHT + self.heights[col] - 1, piece)
+        return row
+
+    def undo(self, col):
+        index = col * COLUMN_HEIGHT + self.heights[col] - 1
+        piece = 1 if self.boards[0] >> index & 1 else 2
+        super().undo(col)
+        self._update(index, -piece)
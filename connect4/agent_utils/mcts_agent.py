@@ -0,0 +1,241 @@
+import math
+import time
+import random
+import threading
+
+from connect4.bitboard import COLUMN_COUNT, ROW_COUNT, column_mask, has_four, position_from_board
+from connect4.agent_utils.solver import winning_cells, possible_moves
+from connect4.agent_utils.move_ordering import CENTER_ORDER
+from connect4.ai_worker import cancel_event
+from connect4.instrumentation import active_stats
+
+# ================================
+# Monte Carlo Tree Search Agent
+# ================================
+# UCT over the same two-mask representation as the solver: `current` holds
+# the stones of the side to move and `mask` every stone. Each node stores
+# the wins (draws count half) of the player who made the move leading to
+# it. The search is anytime: it stops at a time budget or an iteration
+# count, whichever comes first, and the most visited root move is played.
+# After each search the root moves down to the chosen column, and the next
+# call picks up the subtree for the opponent's reply.
+
+CELL_COUNT = ROW_COUNT * COLUMN_COUNT
+
+DEFAULT_TIME_BUDGET = 2.0
+EXPLORATION = 1.4
+# Weight of the ml_agent prior in root move selection; it fades as 1 / visits
+PRIOR_WEIGHT = 1.0
+
+COLUMN_MASKS = tuple(column_mask(col) for col in range(COLUMN_COUNT))
+# Expansion pops from the end, so the centre is tried first
+EXPANSION_ORDER = tuple(reversed(CENTER_ORDER))
+
+
+class Node:
+    __slots__ = ("col", "parent", "children", "untried", "visits", "wins",
+                 "current", "mask", "moves", "terminal", "prior")
+
+    def __init__(self, current, mask, moves, col=None, parent=None, terminal=None):
+        self.col = col
+        self.parent = parent
+        self.children = []
+        self.current = current
+        self.mask = mask
+        self.moves = moves
+        # Result for the player who moved into this node if the game is over
+        self.terminal = terminal
+        self.visits = 0
+        self.wins = 0.0
+        self.prior = 0.0
+        if terminal is None:
+            possible = possible_moves(mask)
+            self.untried = [col for col in EXPANSION_ORDER if possible & COLUMN_MASKS[col]]
+        else:
+            self.untried = []
+
+    def expand(self):
+        col = self.untried.pop()
+        move = possible_moves(self.mask) & COLUMN_MASKS[col]
+        terminal = None
+        if winning_cells(self.current, self.mask) & move:
+            terminal = 1.0
+        elif self.moves + 1 == CELL_COUNT:
+            terminal = 0.5
+        # The opponent is the side to move in the child
+        child = Node(self.current ^ self.mask, self.mask | move, self.moves + 1, col, self, terminal)
+        self.children.append(child)
+        return child
+
+    def select_child(self, exploration):
+        # Only root moves expanded together for their priors can be unvisited
+        unvisited = [child for child in self.children if child.visits == 0]
+        if unvisited:
+            return max(unvisited, key=lambda child: child.prior)
+        log_visits = math.log(self.visits)
+        best, best_score = None, -math.inf
+        for child in self.children:
+            score = (child.wins / child.visits
+                     + exploration * math.sqrt(log_visits / child.visits)
+                     + PRIOR_WEIGHT * child.prior / (child.visits + 1))
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+def rollout(current, mask, moves, guided=True):
+    """
+    Plays random moves to the end of the game. Guided rollouts take an
+    immediate win and block the opponent's, which costs little and makes
+    the results far less noisy. Returns 1 if the side to move at the start
+    wins, 0 if it loses and 0.5 for a draw.
+    """
+    side = 0
+    while moves < CELL_COUNT:
+        possible = possible_moves(mask)
+        if guided:
+            if winning_cells(current, mask) & possible:
+                return 1.0 if side == 0 else 0.0
+            threats = winning_cells(current ^ mask, mask) & possible
+            if threats:
+                move = threats & -threats
+            else:
+                move = possible & random.choice([m for m in COLUMN_MASKS if possible & m])
+        else:
+            move = possible & random.choice([m for m in COLUMN_MASKS if possible & m])
+            if has_four(current | move):
+                return 1.0 if side == 0 else 0.0
+        current, mask = current ^ mask, mask | move
+        moves += 1
+        side ^= 1
+    return 0.5
+
+
+class MCTS:
+    """
+    Search tree that survives between calls. A lock keeps a cancelled
+    search that is still finishing from sharing the tree with a new one.
+    """
+
+    def __init__(self, exploration=EXPLORATION, guided=True):
+        self.exploration = exploration
+        self.guided = guided
+        self.root = None
+        self.lock = threading.Lock()
+
+    def reset(self):
+        self.root = None
+
+    def find_root(self, current, mask, moves):
+        """Reuses the old root, or the child for the opponent's reply, if it matches this position."""
+        root = self.root
+        if root is not None:
+            candidates = root.children if moves == root.moves + 1 else [root]
+            for node in candidates:
+                if node.mask == mask and node.current == current:
+                    node.parent = None
+                    self.root = node
+                    return node
+        self.root = Node(current, mask, moves)
+        return self.root
+
+    def iterate(self, root):
+        node = root
+        # Selection
+        while not node.untried and node.children:
+            node = node.select_child(self.exploration)
+        # Expansion
+        if node.untried:
+            node = node.expand()
+        # Simulation, scored for the player who moved into `node`
+        if node.terminal is not None:
+            result = node.terminal
+        else:
+            result = 1.0 - rollout(node.current, node.mask, node.moves, self.guided)
+        # Backpropagation, switching sides at each ply
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1.0 - result
+            node = node.parent
+
+    def search(self, current, mask, moves, time_budget=DEFAULT_TIME_BUDGET, iterations=None, priors=None,
+               cancel=None):
+        """
+        Returns the most visited column and the number of iterations run.
+        Stops early once `cancel` (an Event) is set.
+        """
+        root = self.find_root(current, mask, moves)
+        if priors:
+            # Expand every root move now so each one carries its prior
+            while root.untried:
+                root.expand()
+            for child in root.children:
+                child.prior = priors.get(child.col, 0.0)
+
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        count = 0
+        while iterations is None or count < iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if cancel is not None and cancel.is_set():
+                break
+            self.iterate(root)
+            count += 1
+            # A won root move needs no more thought
+            if any(child.terminal == 1.0 for child in root.children):
+                break
+
+        if not root.children:
+            root.expand()
+        best = max(root.children, key=lambda child: (child.terminal == 1.0, child.visits))
+        return best.col, count
+
+
+def move_priors(board, player, model):
+    """ml_agent's child scores normalised into a distribution over columns."""
+    from connect4.agent_utils.ml_agent import score_moves
+    columns, scores = score_moves(board, player, model)
+    total = sum(scores)
+    if not columns:
+        return None
+    if total <= 0:
+        return {col: 1.0 / len(columns) for col in columns}
+    return {col: score / total for col, score in zip(columns, scores)}
+
+
+# Shared by every caller so the tree carries over between turns
+searcher = MCTS()
+
+
+def mcts_agent(board, player, time_budget=DEFAULT_TIME_BUDGET, iterations=None, model=None):
+    from connect4.agent_utils.opening_book import book_move
+    pos = position_from_board(board)
+    if not pos.legal_moves():
+        return None
+    col = book_move(pos, player)
+    if col is not None:
+        return col
+    current = pos.boards[player - 1]
+    mask = pos.mask
+
+    priors = None
+    if model is not None:
+        try:
+            priors = move_priors(board, player, model)
+        except Exception as e:
+            print(f"[MCTS] ml priors unavailable: {e}")
+
+    stats = active_stats()
+    with searcher.lock:
+        col, count = searcher.search(current, mask, pos.moves, time_budget, iterations, priors, cancel_event())
+        if stats is not None:
+            stats.nodes += count
+            stats.leaf_evals += count
+        # Move the root below the chosen column, ready for the opponent's reply
+        for child in searcher.root.children:
+            if child.col == col:
+                child.parent = None
+                searcher.root = child
+                break
+    return col
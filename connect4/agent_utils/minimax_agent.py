@@ -1,52 +1,261 @@
-
-from connect4.game_utils import COLUMN_COUNT, valid_move, make_move, check_win
+import time
+from connect4.ai_worker import cancel_event
+from connect4.instrumentation import active_stats
+from connect4.bitboard import COLUMN_COUNT, ROW_COUNT, ZOBRIST_SIDE, position_from_board
+from connect4.agent_utils.transposition_table import TranspositionTable, EXACT, LOWER, UPPER
+from connect4.agent_utils.move_ordering import MoveOrderer
+from connect4.agent_utils.incremental_eval import ScoredPosition
 
 # ================================
 # MiniMax AI Agent (With Alpha-Beta Pruning)
 # ================================
 
-def minimax_agent(board, player):
+# Shared by every search so results carry over from one move to the next
+transposition_table = TranspositionTable()
+
+# Scores are from the root player's point of view, so it is part of the key
+PERSPECTIVE_KEY = 0x9E3779B97F4A7C15
+
+# Seconds per move when no budget is given; stays inside game_logic.TURN_TIME_LIMIT
+DEFAULT_TIME_BUDGET = 5.0
+
+# How many nodes to visit between clock reads
+CLOCK_CHECK_INTERVAL = 1024
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchLimits:
+    """
+    Deadline and node counter shared by every node of one search, plus the
+    move's SearchStats when instrumentation is on. `cancel` is anything with
+    an is_set() method, such as a threading.Event; the search stops soon
+    after it is set.
+    """
+
+    __slots__ = ("deadline", "nodes", "stats", "cancel")
+
+    def __init__(self, deadline=None, stats=None, cancel=None):
+        self.deadline = deadline
+        self.nodes = 0
+        self.stats = stats
+        self.cancel = cancel
+
+    def visit(self):
+        self.nodes += 1
+        if self.nodes % CLOCK_CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchTimeout()
+
+def minimax_agent(board, player, depth=None, time_budget=None, tt=transposition_table, orderer=None, workers=None):
+    """
+    Picks a column for `player`. With `depth` the search is fixed-depth;
+    otherwise it deepens iteratively until `time_budget` seconds are used.
+    With `workers` the root moves are searched in parallel processes.
+    Positions covered by the opening book are played from the book.
+    """
+    from connect4.agent_utils.opening_book import book_move
+    col = book_move(board, player)
+    if col is not None:
+        return col
+    if orderer is None:
+        orderer = MoveOrderer()
+    stats = active_stats()
+    cancel = cancel_event()
+    if depth is not None and workers:
+        from connect4.agent_utils.parallel_search import parallel_search_root
+        try:
+            best_col, _, nodes = parallel_search_root(board, depth, player, workers, cancel=cancel)
+        except SearchTimeout:
+            # Only cancellation stops a fixed-depth search, and then the answer is unused
+            return None
+        if stats is not None:
+            stats.nodes += nodes
+            stats.depth = depth
+        return best_col
+    if depth is not None:
+        pos = ScoredPosition.from_position(position_from_board(board))
+        if stats is None and cancel is None:
+            best_col, _ = search_root(pos, depth, player, tt, orderer=orderer)
+            return best_col
+        limits = SearchLimits(stats=stats, cancel=cancel)
+        if stats is not None:
+            stats.root_moves = pos.moves
+            snapshot = stats.table_snapshot(tt) if tt is not None else None
+        try:
+            best_col, _ = search_root(pos, depth, player, tt, limits, orderer)
+        except SearchTimeout:
+            best_col = None
+        if stats is not None:
+            stats.nodes += limits.nodes
+            stats.depth = depth
+            if tt is not None:
+                stats.add_table_usage(tt, snapshot)
+        return best_col
+    if time_budget is None:
+        time_budget = DEFAULT_TIME_BUDGET
+    best_col, _ = iterative_deepening(board, player, time_budget, tt=tt, orderer=orderer, workers=workers)
+    return best_col
+
+def iterative_deepening(board, player, time_budget=DEFAULT_TIME_BUDGET, max_depth=None, tt=transposition_table,
+                        orderer=None, workers=None):
+    """
+    Searches depth 1, 2, 3... until the time budget runs out and returns the
+    best column from the last completed iteration, plus one stats dict per
+    completed iteration (depth, best_col, score, nodes, elapsed).
+    """
+    pos = ScoredPosition.from_position(position_from_board(board))
+    if max_depth is None:
+        # Deeper than the number of empty cells cannot change the result
+        max_depth = max(1, ROW_COUNT * COLUMN_COUNT - pos.moves - 1)
+
+    start = time.perf_counter()
+    stats = active_stats()
+    limits = SearchLimits(start + time_budget, stats, cancel_event())
+    if stats is not None:
+        stats.root_moves = pos.moves
+        snapshot = stats.table_snapshot(tt) if tt is not None else None
+    best_col = None
+    iterations = []
+    for depth in range(1, max_depth + 1):
+        if iterations and time.perf_counter() >= limits.deadline:
+            break
+        if limits.cancel is not None and limits.cancel.is_set():
+            break
+        limits.nodes = 0
+        if orderer is not None:
+            orderer.new_search()
+        try:
+            if workers:
+                from connect4.agent_utils.parallel_search import parallel_search_root
+                col, score, limits.nodes = parallel_search_root(
+                    board, depth, player, workers, limits.deadline, limits.cancel)
+            else:
+                col, score = search_root(pos, depth, player, tt, limits, orderer)
+        except SearchTimeout:
+            # The aborted search leaves pieces on `pos`; its result is discarded
+            if stats is not None:
+                stats.nodes += limits.nodes
+            break
+        if stats is not None:
+            stats.nodes += limits.nodes
+            stats.depth = depth
+        best_col = col
+        iterations.append({
+            "depth": depth,
+            "best_col": col,
+            "score": score,
+            "nodes": limits.nodes,
+            "elapsed": time.perf_counter() - start,
+            "first_move_cutoff_rate": orderer.first_move_cutoff_rate() if orderer is not None else None,
+        })
+
+    if stats is not None and tt is not None:
+        stats.add_table_usage(tt, snapshot)
+
+    if best_col is None:
+        # Not even depth 1 finished, fall back to the most central legal column
+        legal = position_from_board(board).legal_moves()
+        best_col = min(legal, key=lambda col: abs(col - COLUMN_COUNT // 2)) if legal else None
+    return best_col, iterations
+
+def search_root(pos, depth, player, tt=None, limits=None, orderer=None):
+    """Returns (best_col, score) for `player` to move, searching `depth` plies below each root move."""
     best_col = None
     best_score = -float('inf')
+    # Root moves stay in column order so ties go to the same column as before
     for col in range(COLUMN_COUNT):
-        if valid_move(board, col):
-            temp_board = [row[:] for row in board]  
-            
-            row = make_move(temp_board, col, player)
-            score = minimax(temp_board, 3, -float('inf'), float('inf'), False, player)
+        if pos.can_play(col):
+            pos.play(col, player)
+            score = minimax(pos, depth, best_score, float('inf'), False, player, tt, limits, orderer)
+            pos.undo(col)
             if score > best_score:
                 best_score = score
                 best_col = col
-    return best_col
+    return best_col, best_score
+
+def node_key(pos, maximizing_player, player):
+    to_move = player if maximizing_player else 3 - player
+    key = pos.hash ^ ZOBRIST_SIDE[to_move - 1]
+    return key ^ PERSPECTIVE_KEY if player == 2 else key
 
-def minimax(board, depth, alpha, beta, maximizing_player, player):
-    if depth == 0 or check_win(board, 1) or check_win(board, 2):
-        return evaluate_board(board, player)
-
-    if maximizing_player:
-        max_eval = -float('inf')
-        for col in range(COLUMN_COUNT):
-            if valid_move(board, col):
-                temp_board = [row[:] for row in board]  
-                row = make_move(temp_board, col, player)
-                eval = minimax(temp_board, depth - 1, alpha, beta, False, player)
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:  # Beta cut-off
-                    break
-        return max_eval
+def minimax(pos, depth, alpha, beta, maximizing_player, player, tt=None, limits=None, orderer=None):
+    if limits is not None:
+        limits.visit()
+    # Only the side that just moved can have completed a line
+    last_piece = 3 - player if maximizing_player else player
+    if depth == 0 or pos.has_won(last_piece):
+        if limits is not None and limits.stats is not None:
+            limits.stats.leaf_evals += 1
+        return evaluate_position(pos, player)
+
+    tt_move = None
+    if tt is not None:
+        key = node_key(pos, maximizing_player, player)
+        entry = tt.probe(key)
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                flag, value = entry[2], entry[3]
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return value
+    alpha_orig, beta_orig = alpha, beta
+    best_move = None
+
+    piece = player if maximizing_player else 3 - player
+    if orderer is not None:
+        moves = orderer.order(pos, piece, tt_move)
     else:
-        min_eval = float('inf')
-        for col in range(COLUMN_COUNT):
-            if valid_move(board, col):
-                temp_board = [row[:] for row in board]  
-                row = make_move(temp_board, col, 3 - player)
-                eval = minimax(temp_board, depth - 1, alpha, beta, True, player)
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:  # Alpha cut-off
-                    break
-        return min_eval
+        moves = [col for col in range(COLUMN_COUNT) if pos.can_play(col)]
+
+    best_eval = -float('inf') if maximizing_player else float('inf')
+    for index, col in enumerate(moves):
+        pos.play(col, piece)
+        eval = minimax(pos, depth - 1, alpha, beta, not maximizing_player, player, tt, limits, orderer)
+        pos.undo(col)
+        if maximizing_player:
+            if eval > best_eval:
+                best_eval = eval
+                best_move = col
+            alpha = max(alpha, eval)
+        else:
+            if eval < best_eval:
+                best_eval = eval
+                best_move = col
+            beta = min(beta, eval)
+        if beta <= alpha:  # Cut-off
+            if orderer is not None:
+                orderer.record_cutoff(pos, piece, col, depth, index)
+            if limits is not None and limits.stats is not None:
+                limits.stats.cutoff(pos.moves)
+            break
+
+    if limits is not None and limits.stats is not None:
+        limits.stats.expanded(index + 1 if moves else 0)
+
+    if tt is not None:
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt.store(key, depth, flag, best_eval, best_move)
+    return best_eval
+
+def evaluate_position(pos, player):
+    """Table-driven version of evaluate_board for a Position."""
+    if not isinstance(pos, ScoredPosition):
+        pos = ScoredPosition.from_position(pos)
+    return pos.scores[player - 1]
 
 def evaluate_board(board, player):
     score = 0
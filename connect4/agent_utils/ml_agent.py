@@ -1,15 +1,43 @@
 import os
+import json
+import time
 import random
+import hashlib
+import threading
 import joblib
-import pandas as pd
+import sklearn
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from connect4.game_utils import COLUMN_COUNT, valid_move, make_move
+from connect4.game_utils import COLUMN_COUNT, ROW_COUNT, valid_move, make_move
+from connect4.dataset import SHARD_MANIFEST, load_dataset
+from connect4.instrumentation import active_stats
+from connect4.agent_utils.flat_forest import flat_model
 
 label_encoder = LabelEncoder()
 
+BASE_DIR = os.path.dirname(__file__)
+MODEL_PATH = os.path.join(BASE_DIR, "..", "models", "ml_agent_model.pkl")
+
+# Bump when the artifact layout changes so old files are retrained
+ARTIFACT_VERSION = 1
+
+# Picks the model load_or_train_model and the GUI use when none is asked for:
+# "forest" (train_model) or "sgd" (the out-of-core model from ml_streaming)
+MODEL_KIND_ENV = "CONNECT4_ML_MODEL"
+MODEL_KINDS = ("forest", "sgd")
+
+MODEL_PARAMS = {
+    "n_estimators": 300,
+    "max_depth": 40,
+    "min_samples_split": 3,
+    "min_samples_leaf": 1,
+    "max_features": "sqrt",
+    "random_state": 42,
+    "n_jobs": -1,
+}
+
 def outcome_score(outcome):
     if outcome == 'win':
         return 1.0
@@ -19,19 +47,120 @@ def outcome_score(outcome):
         return 0.0
     return 0.25
 
-def convert_board_positions_to_numeric(df):
-    mapping = {'x': 1, 'o': 2, 'b': 0}
-    return df.applymap(lambda val: mapping.get(val, 0))
+def resolve_dataset_path(dataset_file_name):
+    return os.path.join(BASE_DIR, "..", "connect4_dataset", dataset_file_name)
+
+def model_fingerprint(dataset_path, params=MODEL_PARAMS):
+    """
+    Hash of the dataset contents, the hyperparameters and the sklearn version.
+    A cached model is only reused while this stays the same. For self-play
+    shards the manifest stands in for the data, since it changes whenever a
+    shard is added.
+    """
+    if os.path.isdir(dataset_path):
+        dataset_path = os.path.join(dataset_path, SHARD_MANIFEST)
+    digest = hashlib.sha256()
+    with open(dataset_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(f"{ARTIFACT_VERSION}:{sklearn.__version__}".encode())
+    return digest.hexdigest()
+
+def save_model_artifact(model, fingerprint, model_path=MODEL_PATH):
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "fingerprint": fingerprint,
+        "model": model,
+        "label_encoder": label_encoder,
+    }
+    # Write to a temporary file first so a reader never sees half an artifact
+    tmp_path = model_path + ".tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, model_path)
+
+def load_cached_model(dataset_file_name="connect-4.data", model_path=MODEL_PATH, params=MODEL_PARAMS):
+    """
+    Returns the cached model if its fingerprint matches the current dataset
+    and hyperparameters, restoring the label encoder it was trained with.
+    Without the dataset there is nothing to compare against, so a current
+    artifact is trusted as it is. Returns None when the model has to be
+    retrained.
+    """
+    global label_encoder
+    dataset_path = resolve_dataset_path(dataset_file_name)
+    if not os.path.exists(model_path):
+        return None
+    try:
+        artifact = joblib.load(model_path)
+    except Exception as e:
+        print(f"Failed to load cached model: {e}")
+        return None
+    if not isinstance(artifact, dict) or artifact.get("version") != ARTIFACT_VERSION:
+        print("Cached model has an old format, retraining needed.")
+        return None
+    if not os.path.exists(dataset_path):
+        print(f"Warning: dataset not found at {dataset_path}, "
+              "using the cached model without checking that it is up to date.")
+    elif artifact.get("fingerprint") != model_fingerprint(dataset_path, params):
+        print("Dataset or hyperparameters changed, retraining needed.")
+        return None
+    label_encoder = artifact["label_encoder"]
+    print(f"Loaded cached model from: {model_path}")
+    return artifact["model"]
+
+def model_kind(kind=None):
+    """`kind`, or the one chosen with CONNECT4_ML_MODEL, defaulting to the forest."""
+    kind = kind or os.environ.get(MODEL_KIND_ENV) or "forest"
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown ML model kind: {kind} (expected one of {', '.join(MODEL_KINDS)})")
+    return kind
+
+def load_model(dataset_file_name="connect-4.data", kind=None):
+    """The cached model of the given kind, or None when it has to be trained."""
+    if model_kind(kind) == "sgd":
+        from connect4.agent_utils.ml_streaming import load_streaming_model
+        return load_streaming_model(dataset_file_name)
+    return load_cached_model(dataset_file_name)
+
+def train_model_of_kind(dataset_file_name="connect-4.data", names_file_name="connect-4.names", kind=None):
+    if model_kind(kind) == "sgd":
+        from connect4.agent_utils.ml_streaming import train_streaming
+        return train_streaming(dataset_file_name)
+    return train_model(dataset_file_name, names_file_name)
+
+def load_or_train_model(dataset_file_name="connect-4.data", names_file_name="connect-4.names", kind=None):
+    model = load_model(dataset_file_name, kind)
+    if model is None:
+        model = train_model_of_kind(dataset_file_name, names_file_name, kind)
+    return model
+
+def train_model_in_background(dataset_file_name, names_file_name, on_done, kind=None):
+    """
+    Trains on a daemon thread and calls on_done(model) when finished, or
+    on_done(None) if training failed.
+    """
+    def run():
+        try:
+            model = train_model_of_kind(dataset_file_name, names_file_name, kind)
+        except Exception as e:
+            print(f"Error training ML model: {e}")
+            model = None
+        on_done(model)
+
+    thread = threading.Thread(target=run, name="ml-agent-training", daemon=True)
+    thread.start()
+    return thread
 
 def train_model(dataset_file_name="connect-4.data", names_file_name="connect-4.names"):
     print(f"Training model using dataset: {dataset_file_name}")
-    base_dir = os.path.dirname(__file__)
-    dataset_path = os.path.join(base_dir, "..", "connect4_dataset", dataset_file_name)
+    dataset_path = resolve_dataset_path(dataset_file_name)
 
     print(f"Dataset path: {dataset_path}")
 
     try:
-        data = pd.read_csv(dataset_path, header=None, low_memory=False)
+        boards, labels = load_dataset(dataset_path)
         print("Dataset loaded successfully!")
     except FileNotFoundError:
         print(f"File not found at {dataset_path}. Please check the file path.")
@@ -40,21 +169,17 @@ def train_model(dataset_file_name="connect-4.data", names_file_name="connect-4.n
         print(f"Failed to load dataset: {e}")
         raise
 
-    # Convert board positions from 'x', 'o', 'b' to 1, 2, 0 respectively
-    data.iloc[:, :-1] = convert_board_positions_to_numeric(data.iloc[:, :-1])
-
     # Print class distribution before pruning
-    class_counts = data.iloc[:, -1].value_counts()
-    print("Class distribution:\n", class_counts)
+    classes, counts = np.unique(labels, return_counts=True)
+    print("Class distribution:\n", dict(zip(classes.tolist(), counts.tolist())))
 
     # Drop rows from classes with fewer than 2 examples
-    data = data[data.iloc[:, -1].isin(class_counts[class_counts > 1].index)]
+    keep = np.isin(labels, classes[counts > 1])
 
-    y = label_encoder.fit_transform(data.iloc[:, -1])
-    X = data.iloc[:, :-1]
+    y = label_encoder.fit_transform(labels[keep])
 
     # Normalize features (optional for RF but may help)
-    X = X.astype(float) / 2.0  # 0, 0.5, 1 scale
+    X = boards[keep].astype(float) / 2.0  # 0, 0.5, 1 scale
 
     # Train-test split with fallback if stratified split fails
     try:
@@ -64,15 +189,7 @@ def train_model(dataset_file_name="connect-4.data", names_file_name="connect-4.n
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     # Train Random Forest model with better hyperparameters
-    model = RandomForestClassifier(
-        n_estimators=300,
-        max_depth=40,
-        min_samples_split=3,
-        min_samples_leaf=1,
-        max_features='sqrt',
-        random_state=42,
-        n_jobs=-1
-    )
+    model = RandomForestClassifier(**MODEL_PARAMS)
     model.fit(X_train, y_train)
 
     # Calculate accuracies
@@ -81,71 +198,88 @@ def train_model(dataset_file_name="connect-4.data", names_file_name="connect-4.n
     print(f"Model trained. Test Accuracy: {accuracy:.4f}")
     print(f"Training Accuracy: {train_accuracy:.4f}")
 
-    # Save model
-    models_dir = os.path.join(base_dir, "..", "models")
-    os.makedirs(models_dir, exist_ok=True)
-
-    model_path = os.path.join(models_dir, "ml_agent_model.pkl")
-    joblib.dump(model, model_path)
-    print(f"Model saved to: {model_path}")
+    # Save model together with its label encoder and fingerprint
+    save_model_artifact(model, model_fingerprint(dataset_path))
+    print(f"Model saved to: {MODEL_PATH}")
 
     return model
 
+# Cell symbols understood by the model; anything else is treated as empty
+SYMBOL_MAP = {1: 1, 2: 2, 'X': 1, 'O': 2, ' ': 0, 0: 0}
+
+# Board cell behind each feature: the UCI layout runs up each column from the
+# bottom (a1, a2, ..., g6), and row ROW_COUNT - 1 is the bottom of a list board
+FEATURE_CELLS = np.array([(ROW_COUNT - 1 - row) * COLUMN_COUNT + col
+                          for col in range(COLUMN_COUNT) for row in range(ROW_COUNT)])
+
+# Labels are the first player's result; the second player wants the opposite
+SWAPPED_OUTCOMES = {'win': 'loss', 'loss': 'win'}
+
+def encode_boards(boards):
+    """
+    Encodes list boards into one (len(boards), 42) feature array laid out and
+    scaled like the training data (first player 0.5, second player 1.0),
+    mapping cells through SYMBOL_MAP with a single lookup.
+    """
+    cells = np.array(boards).reshape(len(boards), -1)[:, FEATURE_CELLS]
+    values, inverse = np.unique(cells, return_inverse=True)
+    lookup = np.array([SYMBOL_MAP.get(value.item(), 0) for value in values], dtype=float)
+    return lookup[inverse].reshape(cells.shape) / 2.0
+
 def predict_move(board, model):
-    flat = np.array(board).flatten().reshape(1, -1)
-    symbol_map = {'X': 1, 'O': 2, ' ': 0, 0: 0}
-    flat = np.vectorize(lambda x: symbol_map.get(x, 0))(flat)
-    flat = flat.astype(float) / 2.0
-    prediction = model.predict(flat)
+    prediction = model.predict(encode_boards([board]))
     predicted_class = label_encoder.inverse_transform(prediction)[0]
     return predicted_class
 
-def ml_agent(board, player_symbol, model):
-    best_score = -1
-    best_move = None
-
-    for col in range(COLUMN_COUNT):
-        if valid_move(board, col):
-            simulated_board = [row.copy() for row in board]
-            make_move(simulated_board, col, player_symbol)
-            try:
-                # Use model's probability prediction to add confidence scoring
-                flat_simulated_board = np.array(simulated_board).flatten().reshape(1, -1)
-                symbol_map = {'X': 1, 'O': 2, ' ': 0, 0: 0}
-                flat_simulated_board = np.vectorize(lambda x: symbol_map.get(x, 0))(flat_simulated_board)
-                flat_simulated_board = flat_simulated_board.astype(float) / 2.0
-
-                # Predict the move and get probability
-                preds = model.predict_proba(flat_simulated_board)
-                confidence = np.max(preds)
-                predicted_class = model.predict(flat_simulated_board)[0]
-                score = outcome_score(label_encoder.inverse_transform([predicted_class])[0]) * confidence
-
-                # Evaluate if this is the best move
-                if score > best_score:
-                    best_score = score
-                    best_move = col
-            except Exception as e:
-                print(f"[ML Error] Prediction failed for column {col}: {e}")
-
-    if best_move is not None:
-        return best_move
+def score_moves(board, player_symbol, model):
+    """
+    (legal columns, score of each child position) from one model call. A
+    score is the predicted outcome's value for `player_symbol` times the
+    model's confidence.
+    """
+    valid_columns = [col for col in range(COLUMN_COUNT) if valid_move(board, col)]
+    if not valid_columns:
+        return [], []
 
+    children = []
+    for col in valid_columns:
+        simulated_board = [row.copy() for row in board]
+        make_move(simulated_board, col, player_symbol)
+        children.append(simulated_board)
+
+    # The flattened forest scores a small batch far faster than sklearn's per-tree calls
+    predictor = flat_model(model)
+    stats = active_stats()
+    start = time.perf_counter()
+    preds = predictor.predict_proba(encode_boards(children))
+    if stats is not None:
+        stats.inference_time = time.perf_counter() - start
+        stats.leaf_evals += len(children)
+    confidence = preds.max(axis=1)
+    predicted_classes = model.classes_[preds.argmax(axis=1)]
+    outcomes = label_encoder.inverse_transform(predicted_classes)
+    if player_symbol not in (1, 'X'):
+        outcomes = [SWAPPED_OUTCOMES.get(outcome, outcome) for outcome in outcomes]
+    scores = [outcome_score(outcome) * conf for outcome, conf in zip(outcomes, confidence)]
+    return valid_columns, scores
+
+def ml_agent(board, player_symbol, model):
     valid_columns = [col for col in range(COLUMN_COUNT) if valid_move(board, col)]
-    return random.choice(valid_columns) if valid_columns else None
+    if not valid_columns:
+        return None
+
+    try:
+        # Score every legal child position with one model call
+        columns, scores = score_moves(board, player_symbol, model)
+        # First column with the highest score, as the column-by-column loop picked
+        return columns[int(np.argmax(scores))]
+    except Exception as e:
+        print(f"[ML Error] Prediction failed: {e}")
+
+    return random.choice(valid_columns)
 
 if __name__ == "__main__":
-    base_dir = os.path.dirname(__file__)
-    dataset_file = "connect-4.data"
-    names_file = "connect-4.names"
-    model_path = os.path.join(base_dir, "..", "models", "ml_agent_model.pkl")
-
-    if os.path.exists(model_path):
-        print("Loading existing model...")
-        model = joblib.load(model_path)
-    else:
-        print("Training new model...")
-        model = train_model(dataset_file, names_file)
+    model = load_or_train_model("connect-4.data", "connect-4.names")
 
     board = [[0 for _ in range(7)] for _ in range(6)]
     player_symbol = 'X'
@@ -0,0 +1,192 @@
+"""
+Out-of-core training for ml_agent.
+
+    python -m connect4.agent_utils.ml_streaming --dataset /path/to/selfplay --epochs 3
+
+train_model fits the random forest on the whole dataset at once, which
+stops working once self-play data runs to tens of millions of positions.
+This trains a logistic regression with SGDClassifier.partial_fit instead,
+one chunk at a time from connect4.dataset.iter_chunks. Memory therefore
+depends on --chunk-size, not on the size of the dataset.
+
+Boards are one-hot encoded per cell (empty, first player, second player)
+inside a Pipeline, so the saved model takes the same 42 features as the
+forest: the 0 / 0.5 / 1 cells in UCI column order that training reads from
+the dataset and ml_agent.encode_boards builds from a game board. ml_agent
+can therefore use it unchanged. Every HOLDOUT_EVERY-th row is
+never trained on; each chunk's held-out rows are scored before the chunk
+is learned, which gives a running accuracy at no extra memory. Training
+is checkpointed every --checkpoint-every chunks and resumes from the
+checkpoint when run again on the same data and settings.
+
+The saved model is used in place of the forest by the arena's ml_sgd agent,
+by load_or_train_model(kind="sgd"), and by the game when started with
+CONNECT4_ML_MODEL=sgd.
+"""
+import os
+import time
+import argparse
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from connect4.dataset import iter_chunks
+from connect4.agent_utils import ml_agent
+
+SGD_MODEL_PATH = os.path.join(ml_agent.BASE_DIR, "..", "models", "ml_agent_sgd.pkl")
+CHECKPOINT_PATH = SGD_MODEL_PATH + ".ckpt"
+
+SGD_PARAMS = {
+    "loss": "log_loss",
+    "alpha": 1e-5,
+    "random_state": 42,
+}
+
+OUTCOMES = np.array(["draw", "loss", "win"])
+
+DEFAULT_CHUNK_SIZE = 65_536
+DEFAULT_CHECKPOINT_EVERY = 16
+HOLDOUT_EVERY = 10
+
+
+def cell_features(X):
+    """One-hot cells from the 0 / 0.5 / 1 features used by the forest."""
+    X = np.asarray(X)
+    return np.concatenate([X == 0.0, X == 0.5, X == 1.0], axis=1).astype(np.float32)
+
+
+def build_model(classifier):
+    return Pipeline([("cells", FunctionTransformer(cell_features)), ("sgd", classifier)])
+
+
+def save_checkpoint(state, path=CHECKPOINT_PATH):
+    tmp_path = path + ".tmp"
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(fingerprint, chunk_size, path=CHECKPOINT_PATH):
+    """The saved training state if it belongs to this dataset and chunk size, else None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        state = joblib.load(path)
+    except Exception as e:
+        print(f"Ignoring unreadable checkpoint: {e}")
+        return None
+    if state.get("fingerprint") != fingerprint or state.get("chunk_size") != chunk_size:
+        print("Checkpoint is for a different dataset or chunk size, starting over.")
+        return None
+    return state
+
+
+def peak_memory_mib():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def train_streaming(dataset_file_name="connect-4.data", epochs=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                    checkpoint_every=DEFAULT_CHECKPOINT_EVERY, model_path=SGD_MODEL_PATH,
+                    checkpoint_path=CHECKPOINT_PATH, resume=True):
+    """
+    Trains over `epochs` passes of the dataset and saves the model as an
+    ml_agent artifact at `model_path`. Returns the model.
+    """
+    dataset_path = ml_agent.resolve_dataset_path(dataset_file_name)
+    print(f"Streaming training on: {dataset_path}")
+    ml_agent.label_encoder.fit(OUTCOMES)
+    classes = np.arange(len(OUTCOMES))
+    fingerprint = ml_agent.model_fingerprint(dataset_path, SGD_PARAMS)
+
+    state = load_checkpoint(fingerprint, chunk_size, checkpoint_path) if resume else None
+    if state is not None:
+        print(f"Resuming from epoch {state['epoch'] + 1}, chunk {state['chunk']}")
+    else:
+        state = {
+            "fingerprint": fingerprint, "chunk_size": chunk_size, "classifier": SGDClassifier(**SGD_PARAMS),
+            "epoch": 0, "chunk": 0, "samples": 0, "elapsed": 0.0, "correct": 0, "scored": 0,
+        }
+    classifier = state["classifier"]
+
+    while state["epoch"] < epochs:
+        epoch = state["epoch"]
+        start = time.perf_counter()
+        row = 0
+        for index, (boards, labels) in enumerate(iter_chunks(dataset_path, chunk_size)):
+            holdout = (row + np.arange(len(labels))) % HOLDOUT_EVERY == 0
+            row += len(labels)
+            if index < state["chunk"]:
+                continue
+
+            keep = np.isin(labels, OUTCOMES)
+            X = cell_features(boards[keep] / 2.0)
+            y = ml_agent.label_encoder.transform(labels[keep])
+            held = holdout[keep]
+            if held.any() and hasattr(classifier, "coef_"):
+                state["correct"] += int((classifier.predict(X[held]) == y[held]).sum())
+                state["scored"] += int(held.sum())
+            train = np.flatnonzero(~held)
+            if len(train):
+                # SGD wants shuffled samples; shards and CSV rows come in game order
+                train = np.random.default_rng([epoch, index]).permutation(train)
+                classifier.partial_fit(X[train], y[train], classes=classes)
+            state["samples"] += len(train)
+            state["chunk"] = index + 1
+
+            if state["chunk"] % checkpoint_every == 0:
+                state["elapsed"] += time.perf_counter() - start
+                start = time.perf_counter()
+                save_checkpoint(state, checkpoint_path)
+                print(f"epoch {epoch + 1} chunk {state['chunk']}: {state['samples']} samples, "
+                      f"{state['samples'] / state['elapsed']:.0f} samples/s")
+
+        state["elapsed"] += time.perf_counter() - start
+        accuracy = state["correct"] / state["scored"] if state["scored"] else float("nan")
+        print(f"Epoch {epoch + 1}/{epochs}: held-out accuracy {accuracy:.4f}, "
+              f"{state['samples'] / max(state['elapsed'], 1e-9):.0f} samples/s")
+        state.update(epoch=epoch + 1, chunk=0, correct=0, scored=0)
+        save_checkpoint(state, checkpoint_path)
+
+    model = build_model(classifier)
+    ml_agent.save_model_artifact(model, fingerprint, model_path)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    peak = peak_memory_mib()
+    print(f"Trained on {state['samples']} samples in {state['elapsed']:.1f}s "
+          f"({state['samples'] / max(state['elapsed'], 1e-9):.0f} samples/s)"
+          + (f", peak memory {peak:.0f} MiB" if peak is not None else ""))
+    print(f"Model saved to: {model_path}")
+    return model
+
+
+def load_streaming_model(dataset_file_name="connect-4.data", model_path=SGD_MODEL_PATH):
+    """The saved streaming model if it is up to date with the dataset, else None."""
+    return ml_agent.load_cached_model(dataset_file_name, model_path, SGD_PARAMS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the ml_agent model out of core with SGD.")
+    parser.add_argument("--dataset", default="connect-4.data",
+                        help="file or self-play directory, relative to connect4_dataset unless absolute")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per partial_fit")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY, help="chunks")
+    parser.add_argument("--out", default=SGD_MODEL_PATH, help="model artifact path")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    train_streaming(args.dataset, args.epochs, args.chunk_size, args.checkpoint_every, args.out,
+                    args.out + ".ckpt", resume=not args.restart)
+
+
+if __name__ == "__main__":
+    # Run through the package module so the pickled pipeline refers to
+    # connect4.agent_utils.ml_streaming.cell_features, not __main__
+    from connect4.agent_utils.ml_streaming import main
+    main()
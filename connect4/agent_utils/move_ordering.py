@@ -0,0 +1,73 @@
+from connect4.bitboard import COLUMN_COUNT, ROW_COUNT
+
+# ================================
+# Move Ordering for Alpha-Beta Search
+# ================================
+
+# Central columns take part in more lines, so they are tried first
+CENTER_ORDER = tuple(sorted(range(COLUMN_COUNT), key=lambda col: abs(col - COLUMN_COUNT // 2)))
+
+MAX_PLY = ROW_COUNT * COLUMN_COUNT
+
+
+class MoveOrderer:
+    """
+    Orders the moves of a search node: the transposition table move first,
+    then the killer moves for this ply, then columns by history score, with
+    ties broken center-first. Killers and history can be switched off to get
+    plain static ordering.
+
+    `cutoffs` counts beta cut-offs and `first_move_cutoffs` those caused by
+    the first move tried, which is how well the ordering is doing. Both
+    restart at new_search, so they describe one search.
+    """
+
+    def __init__(self, killers=True, history=True):
+        self.use_killers = killers
+        self.use_history = history
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history = [[0] * COLUMN_COUNT for _ in range(2)]
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def order(self, pos, piece, tt_move=None):
+        moves = [col for col in CENTER_ORDER if pos.heights[col] < ROW_COUNT]
+        if self.use_history:
+            scores = self.history[piece - 1]
+            moves.sort(key=lambda col: -scores[col])
+        front = []
+        if tt_move is not None and tt_move in moves:
+            front.append(tt_move)
+        if self.use_killers:
+            for killer in self.killers[pos.moves]:
+                if killer is not None and killer not in front and killer in moves:
+                    front.append(killer)
+        if front:
+            moves = front + [col for col in moves if col not in front]
+        return moves
+
+    def record_cutoff(self, pos, piece, col, depth, move_index):
+        """Called when `col` caused a cut-off at `pos` (before it was played)."""
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        if self.use_killers:
+            slot = self.killers[pos.moves]
+            if slot[0] != col:
+                slot[1] = slot[0]
+                slot[0] = col
+        if self.use_history:
+            self.history[piece - 1][col] += depth * depth
+
+    def new_search(self):
+        """Forget killers from the previous search, age the history scores and restart the counters."""
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        for slot in self.killers:
+            slot[0] = slot[1] = None
+        for scores in self.history:
+            for col in range(COLUMN_COUNT):
+                scores[col] //= 2
+
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
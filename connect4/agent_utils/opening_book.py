@@ -0,0 +1,302 @@
+"""
+Opening book of solved early-game positions.
+
+    python -m connect4.agent_utils.opening_book             # ply 8 from the UCI data, a few seconds
+    python -m connect4.agent_utils.opening_book --ply 7     # plus ply 7 from the solver
+
+The book is a sorted array of fixed-width records (position key, score) after
+a small header. At runtime the file is memory-mapped and binary-searched, so
+opening it costs nothing and only the pages a lookup touches are read in.
+A position and its mirror image share one record, stored under the smaller
+of their two keys. Scores are weak: 1 if the side to move wins, 0 for a
+draw, -1 for a loss.
+
+The positions come from the UCI connect-4.data file, which holds John
+Tromp's game-theoretic value of every 8-ply position in which nobody has
+won and the next move is not forced; importing it takes about two
+seconds. The pure-Python solver manages well under 100,000 nodes a second
+and cannot solve opening positions from scratch, so shallower plies are
+only back-filled from the ply-8 records on request (--ply), one ply at a
+time, skipping any position that needs more than --node-budget nodes.
+A position whose replies are all in the book is settled in a handful of
+nodes, but one whose replies are forced (and so missing from the data)
+can use the whole budget, one to three seconds at the default. Ply 7 has
+about 25,500 positions, so back-filling it takes up to some 20 CPU hours,
+divided over --workers processes. No book is shipped: get_book imports the
+UCI file the first time it is needed if the dataset is present.
+"""
+import os
+import sys
+import mmap
+import time
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.bitboard import (
+    COLUMN_COUNT, ROW_COUNT, COLUMN_HEIGHT, Position, column_mask, mirror, position_from_board,
+)
+from connect4.agent_utils.solver import (
+    Solver, NodeBudgetExceeded, position_key, can_win_next, non_losing_moves, CELL_COUNT,
+)
+from connect4.agent_utils.move_ordering import CENTER_ORDER
+
+BOOK_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "opening_book.bin")
+UCI_PATH = os.path.join(os.path.dirname(__file__), "..", "connect4_dataset", "connect-4.data")
+
+MAGIC = b"C4BOOK02"
+# magic, record count, deepest ply in the book
+HEADER = struct.Struct("<8sII")
+# canonical position key, weak score for the side to move
+RECORD = struct.Struct("<Qb")
+
+DEFAULT_NODE_BUDGET = 100_000
+
+# Bit index of each UCI feature (a1, a2, ..., g6)
+UCI_BITS = tuple(col * COLUMN_HEIGHT + row for col in range(COLUMN_COUNT) for row in range(ROW_COUNT))
+# First player's result -> weak score
+UCI_SCORES = {"win": 1, "draw": 0, "loss": -1}
+
+
+def canonical_key(current, mask):
+    return min(position_key(current, mask), position_key(mirror(current), mirror(mask)))
+
+
+class OpeningBook:
+    """Read-only view of a book file."""
+
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.max_ply = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def lookup(self, current, mask):
+        """Score for the side to move (whose stones are `current`), or None if not in the book."""
+        key = canonical_key(current, mask)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, score = RECORD.unpack_from(self._map, HEADER.size + middle * RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return score
+        return None
+
+    def lookup_position(self, board, piece):
+        pos = board if isinstance(board, Position) else position_from_board(board)
+        if pos.moves > self.max_ply:
+            return None
+        return self.lookup(pos.boards[piece - 1], pos.mask)
+
+
+_book = None
+
+
+def get_book(path=BOOK_PATH, uci_path=UCI_PATH):
+    """
+    The shared book, opened on first use. A missing book is imported from
+    the UCI dataset when it is there; otherwise this returns None.
+    """
+    global _book
+    if _book is None:
+        try:
+            if not os.path.exists(path) and os.path.exists(uci_path):
+                print(f"Building the opening book from {uci_path}")
+                records, max_ply = import_uci(uci_path)
+                write_book(records, max_ply, path)
+            if os.path.exists(path):
+                _book = OpeningBook(path)
+        except (OSError, ValueError) as e:
+            print(f"Opening book unavailable: {e}")
+    return _book
+
+
+def book_move(board, piece, book=None):
+    """
+    Best column for `piece` according to the book, ties broken center-first.
+    None unless the book proves a win or covers every reply.
+    """
+    book = book or get_book()
+    pos = board if isinstance(board, Position) else position_from_board(board)
+    if book is None or pos.moves + 1 > book.max_ply:
+        return None
+    best_col, best_score = None, None
+    missing = False
+    for col in CENTER_ORDER:
+        if not pos.can_play(col):
+            continue
+        if pos.is_winning_move(col, piece):
+            return col
+        pos.play(col, piece)
+        opponent, mask = pos.boards[2 - piece], pos.mask
+        # Replies that lose at once are not in the book
+        reply_score = 1 if can_win_next(opponent, mask) else book.lookup(opponent, mask)
+        pos.undo(col)
+        if reply_score is None:
+            missing = True
+        elif reply_score < 0:
+            return col
+        elif best_score is None or -reply_score > best_score:
+            best_col, best_score = col, -reply_score
+    return None if missing else best_col
+
+
+# ================================
+# Building the book
+# ================================
+
+def enumerate_positions(max_ply):
+    """
+    Every position reachable in at most `max_ply` moves with alternating play
+    in which nobody has won and the side to move cannot win at once, as
+    (current, mask, moves) with mirror images removed.
+    """
+    seen = set()
+    positions = []
+
+    def visit(current, mask, moves):
+        key = canonical_key(current, mask)
+        if key in seen:
+            return
+        seen.add(key)
+        if can_win_next(current, mask):
+            return
+        positions.append((current, mask, moves))
+        if moves == max_ply:
+            return
+        # Moves that lose at once are not worth a book entry
+        candidates = non_losing_moves(current, mask)
+        for col in range(COLUMN_COUNT):
+            move = candidates & column_mask(col)
+            if move:
+                visit(current ^ mask, mask | move, moves + 1)
+
+    visit(0, 0, 0)
+    return positions
+
+
+def import_uci(dataset_path=UCI_PATH):
+    """Book records from the UCI dataset, as ({canonical key: score}, deepest ply)."""
+    from connect4.dataset import load_dataset
+
+    boards, labels = load_dataset(dataset_path)
+    records = {}
+    max_ply = 0
+    for cells, label in zip(boards.tolist(), labels.tolist()):
+        if label not in UCI_SCORES:
+            continue
+        first = second = 0
+        for bit, cell in zip(UCI_BITS, cells):
+            if cell == 1:
+                first |= 1 << bit
+            elif cell == 2:
+                second |= 1 << bit
+        mask = first | second
+        moves = bin(mask).count("1")
+        # Labels are the first player's result; the book scores the side to move
+        if moves % 2 == 0:
+            current, score = first, UCI_SCORES[label]
+        else:
+            current, score = second, -UCI_SCORES[label]
+        records[canonical_key(current, mask)] = score
+        max_ply = max(max_ply, moves)
+    return records, max_ply
+
+
+_worker_solver = None
+
+
+def _open_worker_solver(path):
+    global _worker_solver
+    _worker_solver = Solver(tt_size=1 << 20, book=OpeningBook(path))
+
+
+def _solve_chunk(args):
+    chunk, node_budget = args
+    _worker_solver.node_budget = node_budget
+    records = []
+    for current, mask, moves in chunk:
+        _worker_solver.nodes = 0
+        try:
+            score = _worker_solver.solve_masks(current, mask, moves, weak=True)
+        except NodeBudgetExceeded:
+            continue
+        records.append((canonical_key(current, mask), score))
+    return records
+
+
+def build_book(min_ply=None, path=BOOK_PATH, workers=None, node_budget=DEFAULT_NODE_BUDGET,
+               uci_path=UCI_PATH, chunk_size=16):
+    """
+    Imports the UCI dataset, then solves the positions of each ply from the
+    deepest imported one down to `min_ply` across a process pool, each ply
+    searching against the records of the plies below it. Positions that
+    exceed `node_budget` are left out. Returns the number of records.
+    """
+    start = time.perf_counter()
+    records, max_ply = import_uci(uci_path)
+    print(f"Imported {len(records)} positions at ply {max_ply} in {time.perf_counter() - start:.1f}s")
+    write_book(records, max_ply, path)
+
+    if min_ply is None or min_ply >= max_ply:
+        return len(records)
+    everything = enumerate_positions(max_ply - 1)
+    for ply in range(max_ply - 1, min_ply - 1, -1):
+        positions = [p for p in everything if p[2] == ply]
+        chunks = [(positions[i:i + chunk_size], node_budget) for i in range(0, len(positions), chunk_size)]
+        print(f"Solving {len(positions)} positions at ply {ply}...")
+        solved = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker_solver, initargs=(path,)) as executor:
+            for done, chunk_records in enumerate(executor.map(_solve_chunk, chunks), 1):
+                records.update(chunk_records)
+                solved += len(chunk_records)
+                if done % 50 == 0 or done == len(chunks):
+                    print(f"  {done}/{len(chunks)} chunks, {solved} solved, "
+                          f"{time.perf_counter() - start:.0f}s")
+        # The next ply up searches against this one
+        write_book(records, max_ply, path)
+    return len(records)
+
+
+def write_book(records, max_ply, path=BOOK_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Worker processes may build the book at the same time
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), max_ply))
+        for key in sorted(records):
+            f.write(RECORD.pack(key, records[key]))
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Connect 4 opening book.")
+    parser.add_argument("--uci", default=UCI_PATH, help="UCI connect-4.data file to import")
+    parser.add_argument("--ply", type=int, default=None,
+                        help="also solve every position from the imported ply down to this one")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--node-budget", type=int, default=DEFAULT_NODE_BUDGET,
+                        help="skip positions that need more nodes than this to solve")
+    parser.add_argument("--out", default=BOOK_PATH)
+    args = parser.parse_args(argv)
+    if args.ply is not None and not 0 <= args.ply < CELL_COUNT:
+        parser.error("--ply out of range")
+    if not os.path.exists(args.uci):
+        parser.error(f"{args.uci} not found; download connect-4.data from the UCI repository")
+    count = build_book(args.ply, args.out, args.workers, args.node_budget, args.uci)
+    print(f"Wrote {count} positions to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Root-parallel minimax over a process pool.
+
+    python -m connect4.agent_utils.parallel_search --depth 6 --workers 1 2 4 8 16
+
+Each root move is searched in its own worker. The best score found so far is
+kept in shared memory and every worker re-reads it before each reply it
+searches, so a good move finishing early lets the other workers prune.
+
+Workers search with the shared bound minus one rather than the bound itself.
+Scores are integers, so any move that ties the best still comes back with an
+exact score, and the chosen column is the lowest one with the best score --
+the same move, with the same score, as a sequential fixed-depth search,
+however the workers are scheduled. Each task starts from an empty table so
+its result does not depend on what the worker searched before.
+
+Every search has a generation number, kept next to the shared bound. A task
+only publishes into the bound of its own generation and stops once a newer
+one starts, and a search that fails (on its deadline, say) starts a new
+generation and waits for its remaining tasks before returning. Tasks are
+given an absolute wall-clock deadline, so time spent queued counts too.
+
+Run as a script it times the search over a set of positions for each worker
+count and prints the speedup curve.
+"""
+import os
+import json
+import time
+import random
+import argparse
+import multiprocessing
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+
+from connect4.bitboard import Position, position_from_board, board_from_position
+from connect4.agent_utils.transposition_table import TranspositionTable
+from connect4.agent_utils.move_ordering import MoveOrderer, CENTER_ORDER
+from connect4.agent_utils.incremental_eval import ScoredPosition
+from connect4.agent_utils.minimax_agent import (
+    SearchLimits, SearchTimeout, minimax, evaluate_position, search_root,
+)
+
+# Stands in for -inf in the shared bound
+NO_BOUND = -float('inf')
+
+# Per-worker table; smaller than the shared one since it only covers one root move
+WORKER_TT_SIZE = 1 << 18
+
+# Seconds between checks of the caller's cancel event while the workers search
+CANCEL_POLL = 0.05
+
+_pool = None
+_pool_workers = None
+_shared_alpha = None
+_shared_generation = None
+
+# Set in each worker by _init_worker
+_worker_alpha = None
+_worker_generation = None
+_worker_tt = None
+
+
+def _init_worker(shared_alpha, shared_generation):
+    global _worker_alpha, _worker_generation, _worker_tt
+    _worker_alpha = shared_alpha
+    _worker_generation = shared_generation
+    _worker_tt = TranspositionTable(WORKER_TT_SIZE)
+
+
+def get_pool(workers=None):
+    """The shared worker pool, (re)started when a different size is asked for."""
+    global _pool, _pool_workers, _shared_alpha, _shared_generation
+    workers = workers or os.cpu_count() or 1
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        # One lock for both, so a bound is always published against the current generation
+        lock = multiprocessing.RLock()
+        _shared_alpha = multiprocessing.Value('d', NO_BOUND, lock=lock)
+        _shared_generation = multiprocessing.Value('q', 0, lock=lock)
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(_shared_alpha, _shared_generation))
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+    _pool_workers = None
+
+
+def new_generation():
+    """Resets the shared bound for a new search; tasks of older searches stop publishing and searching."""
+    with _shared_generation.get_lock():
+        _shared_generation.value += 1
+        _shared_alpha.value = NO_BOUND
+        return _shared_generation.value
+
+
+class Superseded:
+    """Cancel flag for SearchLimits that is set once a newer search has started."""
+
+    def __init__(self, generation):
+        self.generation = generation
+
+    def is_set(self):
+        return _worker_generation.value != self.generation
+
+
+def _publish(score, generation):
+    with _worker_alpha.get_lock():
+        if _worker_generation.value == generation and score > _worker_alpha.value:
+            _worker_alpha.value = score
+
+
+def search_root_move(task):
+    """
+    Worker side: plays root move `col` and searches the replies. Returns
+    (col, score, exact, nodes); when `exact` is False the move failed low
+    and `score` is only an upper bound below the best move's score.
+    Raises SearchTimeout past the deadline or once the search is superseded.
+    """
+    cells, col, depth, player, wall_deadline, generation = task
+    deadline = None
+    if wall_deadline is not None:
+        deadline = time.perf_counter() + (wall_deadline - time.time())
+    limits = SearchLimits(deadline, cancel=Superseded(generation))
+    if limits.cancel.is_set():
+        raise SearchTimeout()
+    _worker_tt.clear()
+    orderer = MoveOrderer()
+
+    pos = ScoredPosition.from_position(position_from_board(cells))
+    pos.play(col, player)
+    limits.visit()
+    if depth == 0 or pos.has_won(player):
+        score = evaluate_position(pos, player)
+        _publish(score, generation)
+        return col, score, True, limits.nodes
+
+    # The opponent's replies, with the bound refreshed before each one
+    score = float('inf')
+    for reply in orderer.order(pos, 3 - player, None):
+        alpha = _worker_alpha.value - 1
+        if score <= alpha:
+            return col, score, False, limits.nodes
+        pos.play(reply, 3 - player)
+        value = minimax(pos, depth - 1, alpha, score, True, player, _worker_tt, limits, orderer)
+        pos.undo(reply)
+        if value < score:
+            score = value
+    if score <= _worker_alpha.value - 1:
+        return col, score, False, limits.nodes
+    _publish(score, generation)
+    return col, score, True, limits.nodes
+
+
+def parallel_search_root(board, depth, player, workers=None, deadline=None, cancel=None):
+    """
+    Same result as minimax_agent.search_root with a fresh table, spread over
+    `workers` processes. Returns (best_col, score, nodes). Raises
+    SearchTimeout if `deadline` (a time.perf_counter() value) passes, or
+    `cancel` (an Event) is set, before every move is searched.
+    """
+    pos = board if isinstance(board, Position) else position_from_board(board)
+    cells = board_from_position(pos)
+    pool = get_pool(workers)
+    generation = new_generation()
+    # perf_counter values mean nothing in another process; the wall clock is shared
+    wall_deadline = time.time() + (deadline - time.perf_counter()) if deadline is not None else None
+
+    # Central moves are usually best, so they go first and publish a bound early
+    tasks = [(cells, col, depth, player, wall_deadline, generation) for col in CENTER_ORDER if pos.can_play(col)]
+    futures = [pool.submit(search_root_move, task) for task in tasks]
+    try:
+        if cancel is not None:
+            pending = futures
+            while pending:
+                if cancel.is_set():
+                    raise SearchTimeout()
+                _, pending = wait(pending, timeout=CANCEL_POLL, return_when=FIRST_EXCEPTION)
+                if any(future.done() and future.exception() is not None for future in futures):
+                    break
+        results = [future.result() for future in futures]
+    except BaseException:
+        # Stop this search's other tasks before another search can start
+        new_generation()
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        raise
+
+    nodes = sum(result[3] for result in results)
+    exact = [(col, score) for col, score, is_exact, _ in results if is_exact]
+    if not exact:
+        return None, NO_BOUND, nodes
+    best_score = max(score for _, score in exact)
+    best_col = min(col for col, score in exact if score == best_score)
+    return best_col, best_score, nodes
+
+
+# ================================
+# Speedup Measurement
+# ================================
+
+def sample_positions(count, plies=(4, 12), seed=0):
+    """Random positions with no winner yet, for timing searches."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        pos = Position()
+        piece = 1
+        for _ in range(rng.randint(*plies)):
+            col = rng.choice(pos.legal_moves())
+            if pos.is_winning_move(col, piece):
+                break
+            pos.play(col, piece)
+            piece = 3 - piece
+        else:
+            boards.append((board_from_position(pos), piece))
+    return boards
+
+
+def speedup_curve(boards, depth, worker_counts):
+    """
+    Times a fixed-depth search of every (board, piece) in `boards`, first
+    sequentially and then with each worker count. Returns one dict per run
+    with seconds, nodes and speedup over the sequential search.
+    """
+    start = time.perf_counter()
+    sequential = []
+    nodes = 0
+    for board, piece in boards:
+        limits = SearchLimits()
+        pos = ScoredPosition.from_position(position_from_board(board))
+        col, score = search_root(pos, depth, piece, TranspositionTable(WORKER_TT_SIZE), limits, MoveOrderer())
+        sequential.append((col, score))
+        nodes += limits.nodes
+    baseline = time.perf_counter() - start
+    curve = [{"workers": 0, "seconds": baseline, "nodes": nodes, "speedup": 1.0}]
+
+    for workers in worker_counts:
+        # Start the worker processes outside the timed section
+        list(get_pool(workers).map(abs, range(workers)))
+        start = time.perf_counter()
+        nodes = 0
+        for (board, piece), expected in zip(boards, sequential):
+            col, score, searched = parallel_search_root(board, depth, piece, workers)
+            if (col, score) != expected:
+                raise AssertionError(f"parallel search returned {(col, score)}, sequential {expected}")
+            nodes += searched
+        seconds = time.perf_counter() - start
+        curve.append({"workers": workers, "seconds": seconds, "nodes": nodes, "speedup": baseline / seconds})
+    shutdown_pool()
+    return curve
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure parallel minimax speedup against worker count.")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the curve here")
+    args = parser.parse_args(argv)
+
+    boards = sample_positions(args.positions, seed=args.seed)
+    curve = speedup_curve(boards, args.depth, args.workers)
+    print(f"{'workers':>8} {'seconds':>9} {'nodes':>10} {'speedup':>8}")
+    for point in curve:
+        label = "seq" if point["workers"] == 0 else point["workers"]
+        print(f"{label:>8} {point['seconds']:>9.2f} {point['nodes']:>10} {point['speedup']:>8.2f}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(curve, f, indent=4)
+    return curve
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,40 @@
 import random
-from connect4.game_utils import COLUMN_COUNT, valid_move, make_move, check_win
+from connect4.bitboard import COLUMN_COUNT, position_from_board
 
 # ================================
 # Random AI Agent
 # ================================
 def random_agent(board, player):
+    pos = position_from_board(board)
     # First, check if the agent can win immediately
-    win_col = find_win_move(board, player)
+    win_col = find_win_move(pos, player)
     if win_col is not None:
         return win_col
     
     # Then, check if the player can win and block that move
-    block_col = block_player_move(board, player)
+    block_col = block_player_move(pos, player)
     if block_col is not None:
         return block_col
     
     # After that, try to play in the center columns for better positioning
     middle_columns = [3, 2, 4, 1, 5, 0, 6]  # Prioritize the center
     for col in middle_columns:
-        if valid_move(board, col):
+        if pos.can_play(col):
             return col
     
     # If no preferred move, pick a random valid column
-    return random.choice([col for col in range(COLUMN_COUNT) if valid_move(board, col)])
+    return random.choice(pos.legal_moves())
 
-def find_win_move(board, player):
+def find_win_move(pos, player):
+    """First column where `player` completes four on the Position `pos`."""
     for col in range(COLUMN_COUNT):
-        if valid_move(board, col):
-            row = make_move(board, col, player)
-            if check_win(board, player):
-                board[row][col] = 0  
-                return col
-            board[row][col] = 0  
+        if pos.can_play(col) and pos.is_winning_move(col, player):
+            return col
     return None  # No winning move available
 
-def block_player_move(board, player):
+def block_player_move(pos, player):
     for col in range(COLUMN_COUNT):
-        if valid_move(board, col):
-            # Try placing the player's piece temporarily
-            row = make_move(board, col, player)
-            if check_win(board, player):
-                board[row][col] = 0  # Undo the move
-                return col
-            board[row][col] = 0  # Undo the move
+        # Try placing the player's piece in the column
+        if pos.can_play(col) and pos.is_winning_move(col, player):
+            return col
     return None  # No immediate threat
\ No newline at end of file
@@ -1,6 +1,8 @@
 
-from connect4.game_utils import COLUMN_COUNT, ROW_COUNT, valid_move, check_win, make_move
+from connect4.bitboard import position_from_board
+from connect4.game_utils import COLUMN_COUNT, ROW_COUNT, valid_move, make_move
 from connect4.agent_utils.random_agent import random_agent
+from connect4.lines import HORIZONTAL_3, VERTICAL_3, DIAGONAL_3, flatten, has_setup
 
 
 # ================================
@@ -9,13 +11,14 @@ from connect4.agent_utils.random_agent import random_agent
 
 
 def smart_agent(board, player):
+    pos = position_from_board(board)
     # Step 1: Checking if the agent can win on the next move (Offensive Play)
-    win_col = find_win_move(board, player)
+    win_col = find_win_move(pos, player)
     if win_col is not None:
         return win_col
     
     # Step 2: Checking if the opponent can win and block them (Defensive Play)
-    block_col = block_player_move(board, player)
+    block_col = block_player_move(pos, player)
     if block_col is not None:
         return block_col
     
@@ -27,27 +30,18 @@ def smart_agent(board, player):
     # Step 4: If no immediate moves, fallback to random play
     return random_agent(board, player)
 
-def find_win_move(board, player):
-    from connect4.main import make_move 
-
+def find_win_move(pos, player):
+    """First column where `player` completes four on the Position `pos`."""
     for col in range(COLUMN_COUNT):
-        if valid_move(board, col):
-            row = make_move(board, col, player)
-            if check_win(board, player):
-                board[row][col] = 0  
-                return col
-            board[row][col] = 0  
+        if pos.can_play(col) and pos.is_winning_move(col, player):
+            return col
     return None  
 
-def block_player_move(board, player):
+def block_player_move(pos, player):
     opponent = 3 - player  
     for col in range(COLUMN_COUNT):
-        if valid_move(board, col):
-            row = make_move(board, col, opponent)
-            if check_win(board, opponent):
-                board[row][col] = 0 
-                return col
-            board[row][col] = 0  
+        if pos.can_play(col) and pos.is_winning_move(col, opponent):
+            return col
     return None  # No need to block
 
 def find_setup_move(board, player):
@@ -63,11 +57,8 @@ def find_setup_move(board, player):
 
 def can_create_setup(board, player):
     # Horizontal, vertical, and diagonal checks for 2-in-a-row with an empty spot
-    return any([
-        check_two_in_a_row(board, player, direction='horizontal'),
-        check_two_in_a_row(board, player, direction='vertical'),
-        check_two_in_a_row(board, player, direction='diagonal')
-    ])
+    cells = flatten(board)
+    return any(has_setup(cells, windows, player) for windows in (HORIZONTAL_3, VERTICAL_3, DIAGONAL_3))
 
 def check_two_in_a_row(board, player, direction):
     if direction == 'horizontal':
@@ -79,34 +70,11 @@ def check_two_in_a_row(board, player, direction):
     return False
 
 def check_horizontal(board, player):
-    for row in range(ROW_COUNT):
-        for col in range(COLUMN_COUNT - 2):
-            window = board[row][col:col+3]
-            if window.count(player) == 2 and window.count(0) == 1:
-                return True
-    return False
+    return has_setup(flatten(board), HORIZONTAL_3, player)
 
 def check_vertical(board, player):
-    for col in range(COLUMN_COUNT):
-        for row in range(ROW_COUNT - 2):
-            window = [board[row+i][col] for i in range(3)]
-            if window.count(player) == 2 and window.count(0) == 1:
-                return True
-    return False
+    return has_setup(flatten(board), VERTICAL_3, player)
 
 def check_diagonal(board, player):
-    # Check positively sloped diagonals
-    for row in range(ROW_COUNT - 2):
-        for col in range(COLUMN_COUNT - 2):
-            window = [board[row+i][col+i] for i in range(3)]
-            if window.count(player) == 2 and window.count(0) == 1:
-                return True
-
-    # Check negatively sloped diagonals
-    for row in range(2, ROW_COUNT):
-        for col in range(COLUMN_COUNT - 2):
-            window = [board[row-i][col+i] for i in range(3)]
-            if window.count(player) == 2 and window.count(0) == 1:
-                return True
-
-    return False
+    # Positively and negatively sloped diagonals
+    return has_setup(flatten(board), DIAGONAL_3, player)
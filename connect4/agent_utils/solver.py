@@ -0,0 +1,299 @@
+import time
+from connect4.bitboard import (
+    COLUMN_COUNT, ROW_COUNT, COLUMN_HEIGHT, BOTTOM_MASK, BOARD_MASK,
+    bottom_mask_col, column_mask, position_from_board, Position,
+)
+from connect4.agent_utils.transposition_table import TranspositionTable, UPPER
+from connect4.agent_utils.move_ordering import CENTER_ORDER
+from connect4.agent_utils.minimax_agent import (
+    CLOCK_CHECK_INTERVAL, DEFAULT_TIME_BUDGET, SearchTimeout, minimax_agent,
+)
+from connect4.ai_worker import cancel_event
+from connect4.instrumentation import active_stats
+
+# ================================
+# Perfect-Play Solver (Negamax With Alpha-Beta)
+# ================================
+# Scores follow the usual convention for solved Connect 4: 0 is a draw, a
+# positive score means the side to move wins, and the earlier the win the
+# bigger the score (22 minus the number of stones the winner has played).
+# The search works on two masks: `current` (stones of the side to move) and
+# `mask` (all stones), with the same bit layout as connect4.bitboard.
+
+CELL_COUNT = ROW_COUNT * COLUMN_COUNT
+
+# Multiplying by an odd constant spreads the low bits of the position key
+# over the table without ever mapping two keys to the same value
+KEY_MIX = 0x9E3779B97F4A7C15
+KEY_MASK = (1 << 64) - 1
+
+DEFAULT_TT_SIZE = 1 << 22
+
+
+class NodeBudgetExceeded(Exception):
+    pass
+
+
+def winning_cells(position, mask):
+    """Empty cells that would complete four in a row for the stones in `position`."""
+    # Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+    for shift in (COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1):
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+
+def possible_moves(mask):
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def can_win_next(current, mask):
+    return winning_cells(current, mask) & possible_moves(mask) != 0
+
+
+def non_losing_moves(current, mask):
+    """Playable cells that do not hand the opponent an immediate win."""
+    possible = possible_moves(mask)
+    opponent_wins = winning_cells(current ^ mask, mask)
+    forced = possible & opponent_wins
+    if forced:
+        if forced & (forced - 1):
+            # Two threats at once cannot both be blocked
+            return 0
+        possible = forced
+    # Never play directly below an opponent's winning cell
+    return possible & ~(opponent_wins >> 1)
+
+
+def position_key(current, mask):
+    """Unique key for a position with the side to move's stones in `current`."""
+    return current + mask
+
+
+def score_to_distance(score, moves):
+    """
+    Plies until the game ends from a position with `moves` stones, counting
+    the winning move, for a non-zero score. None for a draw.
+    """
+    if score == 0:
+        return None
+    # A win scored `s` is made with total move count 43 - 2s or 42 - 2s before
+    # it; the side that wins fixes the parity
+    winner_parity = moves % 2 if score > 0 else (moves + 1) % 2
+    before_win = CELL_COUNT + 1 - 2 * abs(score)
+    if before_win % 2 != winner_parity:
+        before_win -= 1
+    return before_win - moves + 1
+
+
+class Solver:
+    """
+    Exact solver with a transposition table that persists between calls.
+    `node_budget` caps the nodes of a single solve; NodeBudgetExceeded is
+    raised when it runs out. Past `deadline` (a time.perf_counter() value),
+    or once `cancel` (an Event) is set, SearchTimeout is raised instead. In weak solves, positions found in
+    `book` (an OpeningBook, whose scores are weak) are not searched at all.
+    Pass `tt` to share a table between solvers; only share it between
+    solvers that are all weak or all exact.
+    """
+
+    def __init__(self, tt_size=DEFAULT_TT_SIZE, node_budget=None, book=None, tt=None, deadline=None,
+                 cancel=None):
+        self.tt = tt if tt is not None else TranspositionTable(tt_size, policy="always")
+        self.node_budget = node_budget
+        self.book = book
+        self.deadline = deadline
+        self.cancel = cancel
+        self.nodes = 0
+        # Deepest ply the book is probed at in the current solve, -1 for none
+        self.book_ply = -1
+
+    def reset(self):
+        self.tt.clear()
+
+    def negamax(self, current, mask, moves, alpha, beta):
+        # The caller has checked that the side to move cannot win immediately
+        self.nodes += 1
+        if self.node_budget is not None and self.nodes > self.node_budget:
+            raise NodeBudgetExceeded()
+        if self.nodes % CLOCK_CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchTimeout()
+        if moves <= self.book_ply:
+            score = self.book.lookup(current, mask)
+            if score is not None:
+                return score
+
+        candidates = non_losing_moves(current, mask)
+        if candidates == 0:
+            return -((CELL_COUNT - moves) // 2)
+        if moves >= CELL_COUNT - 2:
+            return 0
+
+        lower = -((CELL_COUNT - 2 - moves) // 2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+
+        upper = (CELL_COUNT - 1 - moves) // 2
+        key = ((current + mask) * KEY_MIX) & KEY_MASK
+        entry = self.tt.probe(key)
+        if entry is not None:
+            upper = entry[3]
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+
+        # Try moves that create the most threats first, center-first on ties
+        ordered = []
+        for col in CENTER_ORDER:
+            move = candidates & column_mask(col)
+            if move:
+                threats = bin(winning_cells(current | move, mask)).count("1")
+                index = len(ordered)
+                while index > 0 and ordered[index - 1][0] < threats:
+                    index -= 1
+                ordered.insert(index, (threats, move))
+
+        opponent = current ^ mask
+        for _, move in ordered:
+            new_mask = mask | move
+            score = -self.negamax(opponent, new_mask, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.tt.store(key, 0, UPPER, alpha, None)
+        return alpha
+
+    def solve_masks(self, current, mask, moves, weak=False):
+        """Score of the position for the side to move."""
+        if can_win_next(current, mask):
+            return (CELL_COUNT + 1 - moves) // 2
+        # Book scores are only win/draw/loss, which is all a weak solve needs
+        self.book_ply = self.book.max_ply if weak and self.book is not None else -1
+        if moves <= self.book_ply:
+            score = self.book.lookup(current, mask)
+            if score is not None:
+                return score
+        low = -((CELL_COUNT - moves) // 2)
+        high = (CELL_COUNT + 1 - moves) // 2
+        if weak:
+            low, high = -1, 1
+        # Narrow the score down with null-window searches
+        while low < high:
+            mid = low + (high - low) // 2
+            if mid <= 0 and int(low / 2) < mid:
+                mid = int(low / 2)
+            elif mid >= 0 and int(high / 2) > mid:
+                mid = int(high / 2)
+            result = self.negamax(current, mask, moves, mid, mid + 1)
+            if result <= mid:
+                high = result
+            else:
+                low = result
+        return low
+
+    def solve(self, board, piece, weak=False):
+        """
+        Solves `board` (a list board or Position) with `piece` to move.
+
+        Returns a dict with the score, the result for `piece` ("win", "draw"
+        or "loss"), the distance in plies to the end of a decided game, and
+        the number of nodes searched. In weak mode the score is only -1, 0
+        or 1 and there is no distance.
+        """
+        pos = board if isinstance(board, Position) else position_from_board(board)
+        current, mask = pos.boards[piece - 1], pos.mask
+        self.nodes = 0
+        score = self.solve_masks(current, mask, pos.moves, weak)
+        if weak:
+            score = (score > 0) - (score < 0)
+        return {
+            "score": score,
+            "result": "win" if score > 0 else "loss" if score < 0 else "draw",
+            "distance": None if weak else score_to_distance(score, pos.moves),
+            "nodes": self.nodes,
+        }
+
+    def analyze(self, board, piece, weak=False):
+        """
+        Score of every legal column for `piece` (None for full columns),
+        from `piece`'s point of view.
+        """
+        pos = board if isinstance(board, Position) else position_from_board(board)
+        current, mask, moves = pos.boards[piece - 1], pos.mask, pos.moves
+        self.nodes = 0
+        scores = [None] * COLUMN_COUNT
+        for col in range(COLUMN_COUNT):
+            if pos.heights[col] >= ROW_COUNT:
+                continue
+            move = (mask + bottom_mask_col(col)) & column_mask(col)
+            if winning_cells(current, mask) & move:
+                scores[col] = 1 if weak else (CELL_COUNT + 1 - moves) // 2
+            elif moves + 1 == CELL_COUNT:
+                scores[col] = 0
+            else:
+                opponent = current ^ mask
+                score = -self.solve_masks(opponent, mask | move, moves + 1, weak)
+                scores[col] = (score > 0) - (score < 0) if weak else score
+        return scores
+
+    def best_move(self, board, piece, weak=False):
+        """Best column for `piece`, ties broken center-first, or None if the board is full."""
+        scores = self.analyze(board, piece, weak)
+        legal = [col for col in CENTER_ORDER if scores[col] is not None]
+        if not legal:
+            return None
+        return max(legal, key=lambda col: scores[col])
+
+
+# Nodes the solver agent may spend per move before falling back to minimax
+AGENT_NODE_BUDGET = 100_000
+
+# The agent's table, created on first use and kept from one move to the next
+_agent_table = None
+
+
+def agent_table():
+    global _agent_table
+    if _agent_table is None:
+        _agent_table = TranspositionTable(DEFAULT_TT_SIZE, policy="always")
+    return _agent_table
+
+
+def solver_agent(board, player, time_budget=None):
+    """
+    Plays a move the weak solver has proved best (win, draw or loss is
+    enough to play perfectly) when it gets there within the node budget and
+    `time_budget` seconds. Otherwise minimax searches for the time left.
+    """
+    from connect4.agent_utils.opening_book import get_book, book_move
+    col = book_move(board, player)
+    if col is not None:
+        return col
+    deadline = time.perf_counter() + (DEFAULT_TIME_BUDGET if time_budget is None else time_budget)
+    # A solver per call, so budgets and node counts never leak between searches
+    cancel = cancel_event()
+    solver = Solver(node_budget=AGENT_NODE_BUDGET, book=get_book(), tt=agent_table(), deadline=deadline,
+                    cancel=cancel)
+    stats = active_stats()
+    try:
+        return solver.best_move(board, player, weak=True)
+    except (NodeBudgetExceeded, SearchTimeout):
+        if cancel is not None and cancel.is_set():
+            return None
+        return minimax_agent(board, player, time_budget=max(0.0, deadline - time.perf_counter()))
+    finally:
+        if stats is not None:
+            stats.nodes += solver.nodes
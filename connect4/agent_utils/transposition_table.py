@@ -0,0 +1,79 @@
+# ================================
+# Transposition Table
+# ================================
+
+# Bound types stored with each entry
+EXACT = 0
+LOWER = 1  # The stored value is a lower bound (search failed high)
+UPPER = 2  # The stored value is an upper bound (search failed low)
+
+REPLACEMENT_POLICIES = ("depth", "two_tier", "always")
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results keyed by Zobrist hash.
+
+    Entries are (key, depth, flag, value, best_move) tuples stored at
+    `key % size`. The replacement policy decides what happens when a slot is
+    already taken by another position:
+
+    - "depth": keep whichever entry was searched deeper
+    - "two_tier": a depth-preferred slot plus an always-replace slot
+    - "always": the newest entry wins
+    """
+
+    def __init__(self, size=1 << 20, policy="depth"):
+        if policy not in REPLACEMENT_POLICIES:
+            raise ValueError(f"Unknown replacement policy: {policy}")
+        self.size = size
+        self.policy = policy
+        self.clear()
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.recent = [None] * self.size if self.policy == "two_tier" else None
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        if self.recent is not None:
+            recent = self.recent[index]
+            if recent is not None and recent[0] == key:
+                self.hits += 1
+                return recent
+            entry = entry or recent
+        if entry is None:
+            self.misses += 1
+        else:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, flag, value, best_move):
+        index = key % self.size
+        entry = (key, depth, flag, value, best_move)
+        self.stores += 1
+        current = self.slots[index]
+        if self.policy == "always" or current is None or current[0] == key or current[1] <= depth:
+            self.slots[index] = entry
+        elif self.recent is not None:
+            self.recent[index] = entry
+
+    def stats(self):
+        probes = self.hits + self.misses + self.collisions
+        return {
+            "size": self.size,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
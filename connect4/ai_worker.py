@@ -0,0 +1,73 @@
+import time
+import threading
+
+from connect4.game_utils import choose_ai_move
+
+# ================================
+# Background AI Moves
+# ================================
+# The game loop starts an AIMove when it is an agent's turn and polls it once
+# per frame, so the window keeps handling events while the agent thinks.
+# The agent works on its own copy of the board. The searching agents read
+# cancel_event() on their thread and stop soon after the move is cancelled.
+
+_local = threading.local()
+
+
+def cancel_event():
+    """The cancel event of the AIMove running on this thread, or None."""
+    return getattr(_local, "cancel", None)
+
+
+class AIMove:
+    """One AI move being computed on a daemon thread."""
+
+    def __init__(self, board, agent, turn, label):
+        self.turn = turn
+        self.label = label
+        self.started = time.time()
+        self._col = None
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=([row[:] for row in board], agent), daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, board, agent):
+        _local.cancel = self._cancelled
+        col = choose_ai_move(board, agent, self.turn, self.label)
+        if not self._cancelled.is_set():
+            self._col = col
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set() and not self._cancelled.is_set()
+
+    def stopped(self):
+        """True once the agent has returned, whether or not the move was cancelled."""
+        return self._done.is_set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def result(self):
+        return self._col
+
+    def elapsed(self):
+        return time.time() - self.started
+
+    def cancel(self):
+        """
+        Drops the move. Python threads cannot be interrupted, so the agent
+        has to notice: minimax, the solver and MCTS check the event as they
+        search and return early, and whatever they return is thrown away.
+        Agents that ignore it finish in the background. Check stopped()
+        before starting another search on the same shared tables. The thread
+        is a daemon and never holds up quitting.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
@@ -0,0 +1,358 @@
+"""
+Headless tournament runner for the agents in agent_utils.
+
+    python -m connect4.arena --agents random smart minimax --games 200 --workers 8
+
+Every pairing plays --games games, alternating who moves first, spread over a
+process pool. Each game seeds `random` from --seed and starts with empty
+search tables, so runs are reproducible whatever the worker count.
+Prints win/draw/loss tables, Elo estimates with confidence intervals and
+average move latency per agent. With --record-scores every result is also
+added to the player score store, and --stats writes per-move search
+stats (see connect4.instrumentation).
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import itertools
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.game_utils import create_board, valid_move, drop_piece, check_win_at, board_is_full
+from connect4.instrumentation import StatsRecorder, begin_move, end_move
+
+AGENT_NAMES = ("random", "smart", "minimax", "ml", "ml_sgd", "mcts")
+
+# z for a two-sided 95% interval
+Z_95 = 1.959964
+
+# Agents built once per worker process
+_agent_cache = {}
+
+
+def make_agent(name, minimax_depth=3, minimax_time=None, mcts_iterations=1000):
+    if name == "random":
+        from connect4.agent_utils.random_agent import random_agent
+        return random_agent
+    if name == "smart":
+        from connect4.agent_utils.smart_agent import smart_agent
+        return smart_agent
+    if name == "minimax":
+        from connect4.agent_utils.minimax_agent import minimax_agent
+        if minimax_time is not None:
+            return partial(minimax_agent, time_budget=minimax_time)
+        return partial(minimax_agent, depth=minimax_depth)
+    if name in ("ml", "ml_sgd"):
+        from connect4.agent_utils.ml_agent import load_or_train_model, ml_agent
+        # Named explicitly so CONNECT4_ML_MODEL never changes what an arena name means
+        model = load_or_train_model(kind="sgd" if name == "ml_sgd" else "forest")
+        return partial(ml_agent, model=model)
+    if name == "mcts":
+        from connect4.agent_utils.mcts_agent import mcts_agent
+        # A fixed iteration count keeps seeded games reproducible
+        return partial(mcts_agent, time_budget=None, iterations=mcts_iterations)
+    raise ValueError(f"Unknown agent: {name}")
+
+
+def get_agent(name, options):
+    key = (name, options["minimax_depth"], options["minimax_time"], options["mcts_iterations"])
+    if key not in _agent_cache:
+        _agent_cache[key] = make_agent(name, *key[1:])
+    return _agent_cache[key]
+
+
+def reset_search_state(names):
+    """
+    Clears what the searching agents keep from one move to the next, so a
+    game depends only on its seed and not on the games the worker played
+    before it.
+    """
+    if "minimax" in names:
+        from connect4.agent_utils.minimax_agent import transposition_table
+        transposition_table.clear()
+    if "mcts" in names:
+        from connect4.agent_utils.mcts_agent import searcher
+        searcher.reset()
+
+
+def play_game(task):
+    """
+    Plays one game. `task` is (first, second, seed, options); returns the
+    result for `first` (1, 0.5 or 0), each side's total move time and count,
+    and the per-move stats records when options["collect_stats"] is set.
+    """
+    first, second, seed, options = task
+    random.seed(seed)
+    agents = {1: get_agent(first, options), 2: get_agent(second, options)}
+    reset_search_state((first, second))
+    times = {1: 0.0, 2: 0.0}
+    moves = {1: 0, 2: 0}
+
+    board = create_board()
+    piece = 1
+    result = 0.5
+    records = []
+    collect = options.get("collect_stats", False)
+    while True:
+        name = first if piece == 1 else second
+        stats = begin_move(name, piece, board, collect) if collect else None
+        start = time.perf_counter()
+        try:
+            col = agents[piece]([row[:] for row in board], piece)
+        except Exception as e:
+            print(f"{name} raised {e!r}, forfeiting", file=sys.stderr)
+            col = None
+        times[piece] += time.perf_counter() - start
+        if stats is not None:
+            records.append(end_move(stats, col))
+        moves[piece] += 1
+
+        # An illegal move forfeits the game
+        if col is None or not valid_move(board, col):
+            result = 0.0 if piece == 1 else 1.0
+            break
+        col = int(col)
+        row = drop_piece(board, col, piece)
+        if check_win_at(board, row, col, piece):
+            result = 1.0 if piece == 1 else 0.0
+            break
+        if board_is_full(board):
+            break
+        piece = 3 - piece
+
+    if options.get("record_scores"):
+        from connect4.player_data import save_player_score
+        if result == 0.5:
+            save_player_score(first, 0.5)
+            save_player_score(second, 0.5)
+        else:
+            save_player_score(first if result == 1.0 else second, 1)
+
+    return first, second, result, (times[1], moves[1]), (times[2], moves[2]), records
+
+
+def build_tasks(agents, games, seed, options):
+    tasks = []
+    for pairing, (a, b) in enumerate(itertools.combinations(agents, 2)):
+        for game in range(games):
+            game_seed = seed * 1_000_003 + pairing * 100_003 + game
+            # Alternate who moves first
+            first, second = (a, b) if game % 2 == 0 else (b, a)
+            tasks.append((first, second, game_seed, options))
+    return tasks
+
+
+def score_to_elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_interval(wins, draws, losses):
+    """
+    Elo difference and 95% interval from a win/draw/loss record. The score
+    counts one virtual draw, as fit_ratings does, so a clean sweep still
+    gets a finite estimate. The interval is the Wilson score interval, which
+    stays wide for one-sided records where a Wald interval collapses to a
+    point.
+    """
+    n = wins + draws + losses + 1
+    score = (wins + 0.5 * draws + 0.5) / n
+    z2 = Z_95 * Z_95
+    center = (score + z2 / (2 * n)) / (1 + z2 / n)
+    margin = Z_95 / (1 + z2 / n) * math.sqrt(score * (1 - score) / n + z2 / (4 * n * n))
+    return score_to_elo(score), score_to_elo(center - margin), score_to_elo(center + margin)
+
+
+def fit_ratings(records, agents, iterations=200):
+    """
+    Bradley-Terry ratings (in Elo points, mean 0) from pairwise records,
+    counting draws as half a win each.
+    """
+    strength = {agent: 1.0 for agent in agents}
+    for _ in range(iterations):
+        updated = {}
+        for agent in agents:
+            won = 0.0
+            expected = 0.0
+            for (a, b), (w, d, l) in records.items():
+                if agent not in (a, b):
+                    continue
+                other = b if agent == a else a
+                n = w + d + l
+                points = w + 0.5 * d if agent == a else l + 0.5 * d
+                won += points
+                expected += n / (strength[agent] + strength[other])
+            # One virtual draw against a strength-1 opponent keeps agents
+            # that never (or always) win at a finite rating
+            updated[agent] = (won + 0.5) / (expected + 1.0 / (strength[agent] + 1.0))
+        mean_log = sum(math.log(s) for s in updated.values()) / len(updated)
+        strength = {agent: s / math.exp(mean_log) for agent, s in updated.items()}
+    return {agent: 400 * math.log10(s) for agent, s in strength.items()}
+
+
+def invert(matrix):
+    """Inverse of a small square matrix by Gauss-Jordan elimination."""
+    size = len(matrix)
+    rows = [list(row) + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(matrix)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        scale = rows[col][col]
+        rows[col] = [value / scale for value in rows[col]]
+        for r in range(size):
+            if r != col and rows[r][col]:
+                factor = rows[r][col]
+                rows[r] = [value - factor * pivot_value for value, pivot_value in zip(rows[r], rows[col])]
+    return [row[size:] for row in rows]
+
+
+def rating_intervals(records, ratings):
+    """
+    95% intervals for the fit_ratings ratings, from the Bradley-Terry
+    model's Fisher information at the fitted strengths, counting the
+    virtual draw each agent plays against a strength-1 opponent.
+    """
+    agents = list(ratings)
+    index = {agent: i for i, agent in enumerate(agents)}
+    strength = {agent: 10 ** (ratings[agent] / 400) for agent in agents}
+    info = [[0.0] * len(agents) for _ in agents]
+    for agent in agents:
+        p = strength[agent] / (strength[agent] + 1.0)
+        info[index[agent]][index[agent]] += p * (1 - p)
+    for (a, b), (w, d, l) in records.items():
+        p = strength[a] / (strength[a] + strength[b])
+        weight = (w + d + l) * p * (1 - p)
+        i, j = index[a], index[b]
+        info[i][i] += weight
+        info[j][j] += weight
+        info[i][j] -= weight
+        info[j][i] -= weight
+    covariance = invert(info)
+    # fit_ratings centres the ratings on zero, so only spread about the mean
+    # counts; the level the virtual draws pin down is not part of it
+    size = len(agents)
+    row_means = [sum(row) / size for row in covariance]
+    total_mean = sum(row_means) / size
+    # The model works in natural-log strengths; Elo is 400 / ln 10 of those
+    scale = 400 / math.log(10)
+    intervals = {}
+    for agent in agents:
+        i = index[agent]
+        variance = covariance[i][i] - 2 * row_means[i] + total_mean
+        margin = Z_95 * scale * math.sqrt(max(variance, 0.0))
+        intervals[agent] = (ratings[agent] - margin, ratings[agent] + margin)
+    return intervals
+
+
+def run_tournament(agents, games=100, workers=None, seed=0, minimax_depth=3, minimax_time=None,
+                   record_scores=False, stats_path=None, mcts_iterations=1000):
+    options = {
+        "minimax_depth": minimax_depth, "minimax_time": minimax_time, "mcts_iterations": mcts_iterations,
+        "record_scores": record_scores, "collect_stats": stats_path is not None,
+    }
+    tasks = build_tasks(agents, games, seed, options)
+
+    records = {pair: [0, 0, 0] for pair in itertools.combinations(agents, 2)}
+    latency = {agent: [0.0, 0] for agent in agents}
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (4 * workers))
+    # Workers send their move records back; only this process writes the file
+    recorder = StatsRecorder(stats_path) if stats_path else None
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for first, second, result, first_time, second_time, moves in executor.map(play_game, tasks,
+                                                                                  chunksize=chunksize):
+            if recorder is not None:
+                for record in moves:
+                    recorder.write(record)
+            pair = (first, second) if (first, second) in records else (second, first)
+            score = result if pair[0] == first else 1 - result
+            records[pair][0 if score == 1 else 1 if score == 0.5 else 2] += 1
+            for agent, (seconds, count) in ((first, first_time), (second, second_time)):
+                latency[agent][0] += seconds
+                latency[agent][1] += count
+    elapsed = time.perf_counter() - start
+    if recorder is not None:
+        recorder.close()
+
+    ratings = fit_ratings(records, agents)
+    intervals = rating_intervals(records, ratings)
+    summary = {
+        "games": len(tasks),
+        "elapsed": elapsed,
+        "games_per_minute": 60 * len(tasks) / elapsed if elapsed else 0.0,
+        "pairings": [],
+        "agents": {},
+    }
+    for (a, b), (w, d, l) in records.items():
+        elo, low, high = elo_interval(w, d, l)
+        summary["pairings"].append({
+            "agent": a, "opponent": b, "wins": w, "draws": d, "losses": l,
+            "elo_diff": elo, "elo_low": low, "elo_high": high,
+        })
+    for agent in agents:
+        w = sum(r[0] if a == agent else r[2] for (a, b), r in records.items() if agent in (a, b))
+        d = sum(r[1] for (a, b), r in records.items() if agent in (a, b))
+        l = sum(r[2] if a == agent else r[0] for (a, b), r in records.items() if agent in (a, b))
+        seconds, count = latency[agent]
+        summary["agents"][agent] = {
+            "wins": w, "draws": d, "losses": l,
+            "elo": ratings[agent],
+            "elo_low": intervals[agent][0],
+            "elo_high": intervals[agent][1],
+            "avg_move_ms": 1000 * seconds / count if count else 0.0,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{summary['games']} games in {summary['elapsed']:.1f}s "
+          f"({summary['games_per_minute']:.0f} games/min)\n")
+    print(f"{'agent':>10} {'opponent':>10} {'W':>6} {'D':>6} {'L':>6} {'Elo diff (95% CI)':>26}")
+    for p in summary["pairings"]:
+        print(f"{p['agent']:>10} {p['opponent']:>10} {p['wins']:>6} {p['draws']:>6} {p['losses']:>6} "
+              f"{p['elo_diff']:>+8.0f} [{p['elo_low']:+.0f}, {p['elo_high']:+.0f}]")
+    print(f"\n{'agent':>10} {'W':>6} {'D':>6} {'L':>6} {'Elo (95% CI)':>24} {'ms/move':>10}")
+    ranked = sorted(summary["agents"].items(), key=lambda item: item[1]["elo"], reverse=True)
+    for agent, s in ranked:
+        print(f"{agent:>10} {s['wins']:>6} {s['draws']:>6} {s['losses']:>6} "
+              f"{s['elo']:>+8.0f} [{s['elo_low']:+.0f}, {s['elo_high']:+.0f}] {s['avg_move_ms']:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play the Connect 4 agents against each other headlessly.")
+    parser.add_argument("--agents", nargs="+", choices=AGENT_NAMES, default=["random", "smart", "minimax"])
+    parser.add_argument("--games", type=int, default=100, help="games per pairing")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--minimax-depth", type=int, default=3)
+    parser.add_argument("--minimax-time", type=float, default=None,
+                        help="per-move time budget for minimax instead of a fixed depth")
+    parser.add_argument("--mcts-iterations", type=int, default=1000, help="MCTS playouts per move")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results here")
+    parser.add_argument("--record-scores", action="store_true",
+                        help="add every result to the player score store, as the GUI does")
+    parser.add_argument("--stats", dest="stats_path", default=None,
+                        help="write per-move search stats here (JSON lines, or CSV for a .csv path)")
+    args = parser.parse_args(argv)
+
+    if len(set(args.agents)) < 2:
+        parser.error("need at least two different agents")
+
+    summary = run_tournament(list(dict.fromkeys(args.agents)), args.games, args.workers, args.seed,
+                             args.minimax_depth, args.minimax_time, args.record_scores, args.stats_path,
+                             args.mcts_iterations)
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(summary, f, indent=4)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Speed benchmarks for the board operations, evaluators and agents.
+
+    python -m connect4.benchmark --out bench.json
+    python -m connect4.benchmark --compare baseline.json bench.json --threshold 0.1
+
+Every benchmark runs over the same corpus of opening, midgame and endgame
+positions, generated from a fixed seed. Each one is timed (best of
+--repeat runs) and then run once more under tracemalloc for its peak
+memory. Results are saved as JSON. --compare prints the change in ops/sec
+between two result files and exits with status 1 if any benchmark slowed
+down by more than --threshold.
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import platform
+import tracemalloc
+from functools import partial
+
+from connect4.bitboard import Position, board_from_position, position_from_board
+from connect4.game_utils import check_win
+from connect4.agent_utils.minimax_agent import (
+    SearchLimits, evaluate_board, evaluate_position, search_root,
+)
+from connect4.agent_utils.transposition_table import TranspositionTable
+from connect4.agent_utils.move_ordering import MoveOrderer
+from connect4.agent_utils.incremental_eval import ScoredPosition
+
+# Stones on the board for each phase of the corpus
+PHASES = {
+    "opening": (2, 8),
+    "midgame": (14, 24),
+    "endgame": (28, 36),
+}
+POSITIONS_PER_PHASE = 20
+CORPUS_SEED = 20240501
+
+DEFAULT_MAX_DEPTH = 4
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10
+
+
+def build_corpus(seed=CORPUS_SEED, per_phase=POSITIONS_PER_PHASE):
+    """
+    (phase, board, piece to move) for positions reached by random play with
+    no winner yet and at least one legal move.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for phase, (low, high) in PHASES.items():
+        count = 0
+        while count < per_phase:
+            pos = Position()
+            piece = 1
+            target = rng.randint(low, high)
+            while pos.moves < target:
+                col = rng.choice(pos.legal_moves())
+                if pos.is_winning_move(col, piece):
+                    break
+                pos.play(col, piece)
+                piece = 3 - piece
+            if pos.moves == target and pos.legal_moves():
+                corpus.append((phase, board_from_position(pos), piece))
+                count += 1
+    return corpus
+
+
+def corpus_hash(corpus):
+    return hashlib.sha256(json.dumps(corpus).encode()).hexdigest()[:16]
+
+
+# ================================
+# Benchmarks
+# ================================
+# Each benchmark takes the corpus and returns (operations, nodes); nodes is
+# None for benchmarks that do not search.
+
+def bench_check_win(corpus):
+    for _, board, _ in corpus:
+        check_win(board, 1)
+        check_win(board, 2)
+    return 2 * len(corpus), None
+
+
+def bench_evaluate_board(corpus):
+    for _, board, piece in corpus:
+        evaluate_board(board, piece)
+    return len(corpus), None
+
+
+def bench_evaluate_position(corpus, positions):
+    for pos, (_, _, piece) in zip(positions, corpus):
+        evaluate_position(pos, piece)
+    return len(corpus), None
+
+
+def bench_minimax(corpus, depth):
+    nodes = 0
+    for _, board, piece in corpus:
+        pos = ScoredPosition.from_position(position_from_board(board))
+        limits = SearchLimits()
+        search_root(pos, depth, piece, TranspositionTable(1 << 16), limits, MoveOrderer())
+        nodes += limits.nodes
+    return len(corpus), nodes
+
+
+def bench_agent(agent, corpus):
+    for _, board, piece in corpus:
+        agent([row[:] for row in board], piece)
+    return len(corpus), None
+
+
+def build_benchmarks(corpus, max_depth, only=None):
+    """Name -> zero-argument callable, skipping agents whose dependencies are missing."""
+    from connect4.agent_utils.random_agent import random_agent
+    from connect4.agent_utils.smart_agent import smart_agent
+
+    positions = [ScoredPosition.from_position(position_from_board(board)) for _, board, _ in corpus]
+    benchmarks = {
+        "check_win": partial(bench_check_win, corpus),
+        "evaluate_board": partial(bench_evaluate_board, corpus),
+        "evaluate_position": partial(bench_evaluate_position, corpus, positions),
+    }
+    for depth in range(1, max_depth + 1):
+        benchmarks[f"minimax_d{depth}"] = partial(bench_minimax, corpus, depth)
+    benchmarks["random_agent"] = partial(bench_agent, random_agent, corpus)
+    benchmarks["smart_agent"] = partial(bench_agent, smart_agent, corpus)
+
+    if only is None or "ml_agent" in only:
+        try:
+            from connect4.agent_utils.ml_agent import load_cached_model, ml_agent
+            model = load_cached_model()
+        except ImportError as e:
+            print(f"Skipping ml_agent: {e}")
+            model = None
+        if model is not None:
+            benchmarks["ml_agent"] = partial(bench_agent, partial(ml_agent, model=model), corpus)
+        else:
+            print("Skipping ml_agent: no trained model for the current dataset")
+
+    if only is not None:
+        benchmarks = {name: bench for name, bench in benchmarks.items()
+                      if name in only or name.split("_d")[0] in only}
+    return benchmarks
+
+
+def run_benchmark(bench, repeat):
+    best = None
+    for _ in range(repeat):
+        # Same seed every run so random_agent does identical work
+        random.seed(0)
+        start = time.perf_counter()
+        ops, nodes = bench()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    result = {
+        "seconds": best,
+        "ops": ops,
+        "ops_per_sec": ops / best if best else None,
+        "nodes": nodes,
+        "nodes_per_sec": nodes / best if nodes is not None and best else None,
+    }
+
+    random.seed(0)
+    tracemalloc.start()
+    try:
+        bench()
+        result["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run_suite(max_depth=DEFAULT_MAX_DEPTH, repeat=DEFAULT_REPEAT, only=None, seed=CORPUS_SEED):
+    corpus = build_corpus(seed)
+    benchmarks = build_benchmarks(corpus, max_depth, only)
+    results = {}
+    for name, bench in benchmarks.items():
+        results[name] = run_benchmark(bench, repeat)
+        print_result(name, results[name])
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": corpus_hash(corpus),
+            "positions": len(corpus),
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def print_result(name, r):
+    nodes = f"{r['nodes_per_sec']:>12.0f}" if r["nodes_per_sec"] is not None else f"{'-':>12}"
+    print(f"{name:>18} {r['ops_per_sec']:>12.1f} {nodes} {r['peak_kib']:>10.1f}")
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Prints the ops/sec change of every benchmark in both runs. Returns the
+    names that got slower by more than `threshold` (a fraction).
+    """
+    if baseline["meta"]["corpus"] != current["meta"]["corpus"]:
+        print("Warning: the two runs used different corpora")
+    regressions = []
+    print(f"{'benchmark':>18} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["ops_per_sec"]
+        after = result["ops_per_sec"]
+        change = after / before - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:>18} {before:>12.1f} {after:>12.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Connect 4 board operations and agents.")
+    parser.add_argument("--out", default=None, help="write the results here as JSON")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH, help="minimax depths 1..N")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", nargs="+", default=None,
+                        help="run only these benchmarks (\"minimax\" selects every depth)")
+    parser.add_argument("--seed", type=int, default=CORPUS_SEED, help="corpus seed")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), default=None)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed ops/sec drop as a fraction, for --compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the {args.threshold:.0%} threshold")
+            sys.exit(1)
+        return
+
+    print(f"{'benchmark':>18} {'ops/sec':>12} {'nodes/sec':>12} {'peak KiB':>10}")
+    summary = run_suite(args.max_depth, args.repeat, args.only, args.seed)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=4)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import random
+
+from connect4.constants import COLUMN_COUNT, ROW_COUNT
+
+# ================================
+# Bitboard layout
+# ================================
+# Each column takes ROW_COUNT + 1 bits (one spare bit on top so that shifts
+# never wrap into the next column). Bit `col * COLUMN_HEIGHT + height` is the
+# cell `height` rows above the bottom of column `col`. List boards store the
+# top row first, so list row `r` is bitboard height `ROW_COUNT - 1 - r`.
+COLUMN_HEIGHT = ROW_COUNT + 1
+
+BOTTOM_MASK = sum(1 << (col * COLUMN_HEIGHT) for col in range(COLUMN_COUNT))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROW_COUNT) - 1)
+
+# Shift distances for vertical, horizontal and the two diagonals
+DIRECTIONS = (1, COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1)
+
+
+def bottom_mask_col(col):
+    return 1 << (col * COLUMN_HEIGHT)
+
+
+def column_mask(col):
+    return ((1 << ROW_COUNT) - 1) << (col * COLUMN_HEIGHT)
+
+
+def cell_bit(row, col):
+    """Bit for list-board cell (row, col), row 0 being the top row."""
+    return 1 << (col * COLUMN_HEIGHT + ROW_COUNT - 1 - row)
+
+
+def mirror(bits):
+    """Reflects a bitmask left to right (column c becomes column COLUMN_COUNT - 1 - c)."""
+    column_bits = (1 << COLUMN_HEIGHT) - 1
+    mirrored = 0
+    for col in range(COLUMN_COUNT):
+        mirrored |= ((bits >> (col * COLUMN_HEIGHT)) & column_bits) << ((COLUMN_COUNT - 1 - col) * COLUMN_HEIGHT)
+    return mirrored
+
+
+def has_four(bits):
+    """True if the given piece mask contains four in a row in any direction."""
+    for shift in DIRECTIONS:
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+# ================================
+# Zobrist keys
+# ================================
+# One random 64-bit key per (piece, bit index); a position's hash is the XOR of
+# the keys of its occupied cells. Seeded so hashes are stable between runs.
+_zobrist_rng = random.Random(20240424)
+ZOBRIST_PIECES = tuple(
+    tuple(_zobrist_rng.getrandbits(64) for _ in range(COLUMN_COUNT * COLUMN_HEIGHT))
+    for _ in range(2)
+)
+# XORed in by searches that need to tell apart whose turn it is
+ZOBRIST_SIDE = tuple(_zobrist_rng.getrandbits(64) for _ in range(2))
+
+
+# ================================
+# Position
+# ================================
+
+class Position:
+    """
+    Connect 4 position stored as one bitmask per piece plus column heights.
+    Pieces are 1 and 2, as on the list boards used by the GUI.
+    """
+
+    __slots__ = ("boards", "heights", "moves", "hash")
+
+    def __init__(self):
+        self.boards = [0, 0]
+        self.heights = [0] * COLUMN_COUNT
+        self.moves = 0
+        self.hash = 0
+
+    @property
+    def mask(self):
+        return self.boards[0] | self.boards[1]
+
+    def copy(self):
+        pos = self.__class__.__new__(self.__class__)
+        pos.boards = self.boards[:]
+        pos.heights = self.heights[:]
+        pos.moves = self.moves
+        pos.hash = self.hash
+        return pos
+
+    def can_play(self, col):
+        return 0 <= col < COLUMN_COUNT and self.heights[col] < ROW_COUNT
+
+    def legal_moves_mask(self):
+        """One bit per playable column, set at the next free cell."""
+        return (self.mask + BOTTOM_MASK) & BOARD_MASK
+
+    def legal_moves(self):
+        return [col for col in range(COLUMN_COUNT) if self.heights[col] < ROW_COUNT]
+
+    def play(self, col, piece):
+        """Drop `piece` into `col`. Returns the list-board row, or -1 if the column is full."""
+        height = self.heights[col]
+        if height >= ROW_COUNT:
+            return -1
+        index = col * COLUMN_HEIGHT + height
+        self.boards[piece - 1] |= 1 << index
+        self.hash ^= ZOBRIST_PIECES[piece - 1][index]
+        self.heights[col] = height + 1
+        self.moves += 1
+        return ROW_COUNT - 1 - height
+
+    def undo(self, col):
+        """Remove the top piece of `col`."""
+        height = self.heights[col] - 1
+        index = col * COLUMN_HEIGHT + height
+        bit = 1 << index
+        piece = 1 if self.boards[0] & bit else 2
+        self.boards[piece - 1] &= ~bit
+        self.hash ^= ZOBRIST_PIECES[piece - 1][index]
+        self.heights[col] = height
+        self.moves -= 1
+
+    def is_winning_move(self, col, piece):
+        """True if dropping `piece` into `col` would complete four in a row."""
+        move = (self.mask + bottom_mask_col(col)) & column_mask(col)
+        return has_four(self.boards[piece - 1] | move)
+
+    def has_won(self, piece):
+        return has_four(self.boards[piece - 1])
+
+    def is_full(self):
+        return self.moves >= ROW_COUNT * COLUMN_COUNT
+
+    def piece_at(self, row, col):
+        bit = cell_bit(row, col)
+        if self.boards[0] & bit:
+            return 1
+        if self.boards[1] & bit:
+            return 2
+        return 0
+
+    def key(self):
+        return self.boards[0], self.boards[1]
+
+
+# ================================
+# List board adapters
+# ================================
+
+def piece_mask(board, piece):
+    """Bitmask of the cells holding `piece` on a list board."""
+    bits = 0
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell == piece:
+                bits |= cell_bit(r, c)
+    return bits
+
+
+def position_from_board(board):
+    pos = Position()
+    for c in range(COLUMN_COUNT):
+        height = 0
+        for r in range(ROW_COUNT - 1, -1, -1):
+            cell = board[r][c]
+            if cell == 0:
+                break
+            if cell in (1, 2):
+                index = c * COLUMN_HEIGHT + height
+                pos.boards[cell - 1] |= 1 << index
+                pos.hash ^= ZOBRIST_PIECES[cell - 1][index]
+            height += 1
+        pos.heights[c] = height
+        pos.moves += height
+    return pos
+
+
+def board_from_position(pos):
+    return [[pos.piece_at(r, c) for c in range(COLUMN_COUNT)] for r in range(ROW_COUNT)]
+
+
+def as_board(board_or_position):
+    """Accept either a list board or a Position and return a list board."""
+    if isinstance(board_or_position, Position):
+        return board_from_position(board_or_position)
+    return board_or_position
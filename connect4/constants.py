@@ -1,5 +1,3 @@
-import pygame
-
 SQUARE_SIZE = 100  # Size of each square in the grid
 ROW_COUNT = 6
 COLUMN_COUNT = 7
@@ -13,6 +11,13 @@ YELLOW = (255, 255, 0)
 BLACK = (0, 0, 0)
 BLUE = (70, 130, 200)
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-
 
+def __getattr__(name):
+    # The window is only opened the first time something asks for `screen`,
+    # so importing the constants (and the game rules) needs no display
+    if name == "screen":
+        import pygame
+        global screen
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        return screen
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,194 @@
+import os
+import json
+import itertools
+import numpy as np
+
+# ================================
+# UCI Connect-4 Dataset Loader
+# ================================
+# Decodes connect-4.data ("x,o,b,...,label" rows) into a uint8 (N, 42) board
+# array (x=1, o=2, b=0) plus a label vector. The decoded arrays are cached as
+# .npy files next to the source and reused until the source file changes;
+# the board array is opened memory-mapped. A directory is read as self-play
+# shards written by connect4.selfplay, which use the same board layout.
+
+CELL_COUNT = 42
+
+SHARD_MANIFEST = "manifest.json"
+# Self-play labels are stored as int8 from the first player's point of view
+LABEL_NAMES = {1: "win", 0: "draw", -1: "loss"}
+
+# Byte value -> cell code
+CELL_LOOKUP = np.zeros(256, dtype=np.uint8)
+CELL_LOOKUP[ord("x")] = 1
+CELL_LOOKUP[ord("o")] = 2
+
+
+def cache_paths(dataset_path):
+    base = os.path.splitext(dataset_path)[0]
+    return base + ".boards.npy", base + ".labels.npy", base + ".cache.json"
+
+
+def _source_stamp(dataset_path):
+    stat = os.stat(dataset_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def decode_fixed_rows(rows):
+    """
+    Decodes CSV rows (bytes) whose cells are all single characters, or
+    returns None if any row is laid out differently.
+    """
+    width = 2 * CELL_COUNT
+    if not all(len(row) > width for row in rows):
+        return None
+    # Every cell is a single character followed by a comma, so the board
+    # part of a row has a fixed layout and can be decoded in one shot
+    fixed = np.frombuffer(b"".join(row[:width] for row in rows), dtype=np.uint8).reshape(len(rows), width)
+    if not (fixed[:, 1::2] == ord(",")).all():
+        return None
+    boards = CELL_LOOKUP[fixed[:, 0::2]]
+    labels = np.array([row[width:].decode().strip() for row in rows])
+    return boards, labels
+
+
+def _decode_rows_slowly(rows):
+    boards, labels = [], []
+    for row in rows:
+        fields = [field.strip() for field in row.decode().split(",")]
+        if len(fields) != CELL_COUNT + 1 or not all(fields):
+            continue
+        boards.append([CELL_LOOKUP[ord(cell)] if len(cell) == 1 else 0 for cell in fields[:-1]])
+        labels.append(fields[-1])
+    return np.array(boards, dtype=np.uint8).reshape(-1, CELL_COUNT), np.array(labels, dtype=str)
+
+
+def decode_dataset(dataset_path):
+    """Parses the CSV into (boards, labels) with NumPy lookups instead of per-cell Python calls."""
+    with open(dataset_path, "rb") as f:
+        rows = [row for row in f.read().splitlines() if row.strip()]
+    if not rows:
+        return np.zeros((0, CELL_COUNT), dtype=np.uint8), np.array([], dtype=str)
+
+    decoded = decode_fixed_rows(rows)
+    if decoded is not None:
+        return decoded
+
+    # Irregular rows: fall back to a categorical decode via pandas
+    import pandas as pd
+    data = pd.read_csv(dataset_path, header=None, dtype="category").dropna()
+    boards = np.empty((len(data), CELL_COUNT), dtype=np.uint8)
+    for i in range(CELL_COUNT):
+        column = data.iloc[:, i]
+        codes = np.array([CELL_LOOKUP[ord(c)] if len(c) == 1 else 0 for c in column.cat.categories], dtype=np.uint8)
+        boards[:, i] = codes[column.cat.codes.to_numpy()]
+    labels = data.iloc[:, -1].astype(str).to_numpy()
+    return boards, labels
+
+
+def load_shard(shard_path):
+    with np.load(shard_path) as shard:
+        return {name: shard[name] for name in shard.files}
+
+
+def load_shards(directory):
+    """(boards, labels) from every shard listed in the directory's manifest, labels as UCI strings."""
+    with open(os.path.join(directory, SHARD_MANIFEST), "r") as f:
+        manifest = json.load(f)
+    boards, labels = [], []
+    for entry in manifest["shards"]:
+        shard = load_shard(os.path.join(directory, entry["file"]))
+        boards.append(shard["boards"])
+        labels.append(shard["labels"])
+    if not boards:
+        return np.zeros((0, CELL_COUNT), dtype=np.uint8), np.array([], dtype=str)
+    names = np.empty(3, dtype=object)
+    for value, name in LABEL_NAMES.items():
+        names[value + 1] = name
+    return np.concatenate(boards), names[np.concatenate(labels).astype(np.int64) + 1].astype(str)
+
+
+def iter_chunks(dataset_path, chunk_size):
+    """
+    Yields (boards, labels) chunks of at most `chunk_size` rows without
+    loading the whole dataset: self-play shards one at a time, a cached CSV
+    through its memory-mapped arrays, and otherwise the CSV a block of lines
+    at a time. Memory use depends on the chunk (or shard) size only.
+    """
+    if os.path.isdir(dataset_path):
+        with open(os.path.join(dataset_path, SHARD_MANIFEST), "r") as f:
+            manifest = json.load(f)
+        names = np.array([LABEL_NAMES[value] for value in (-1, 0, 1)])
+        for entry in manifest["shards"]:
+            shard = load_shard(os.path.join(dataset_path, entry["file"]))
+            for start in range(0, len(shard["labels"]), chunk_size):
+                labels = shard["labels"][start:start + chunk_size].astype(np.int64) + 1
+                yield shard["boards"][start:start + chunk_size], names[labels]
+        return
+
+    boards_path, labels_path, meta_path = cache_paths(dataset_path)
+    boards = labels = None
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r") as f:
+                cached_stamp = json.load(f)
+            if cached_stamp == _source_stamp(dataset_path):
+                boards = np.load(boards_path, mmap_mode="r")
+                labels = np.load(labels_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable dataset cache: {e}")
+            boards = labels = None
+    # Only opening the cache falls back to the CSV; an error part way through
+    # must not restart the data from row 0
+    if boards is not None:
+        for start in range(0, len(boards), chunk_size):
+            yield np.array(boards[start:start + chunk_size]), np.array(labels[start:start + chunk_size])
+        return
+
+    with open(dataset_path, "rb") as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                break
+            rows = [line.rstrip(b"\r\n") for line in lines if line.strip()]
+            if not rows:
+                continue
+            decoded = decode_fixed_rows(rows)
+            yield decoded if decoded is not None else _decode_rows_slowly(rows)
+
+
+def load_dataset(dataset_path, use_cache=True):
+    """
+    Returns (boards, labels) for the dataset, decoding it only when there is
+    no cache or the source changed since the cache was written.
+    """
+    if os.path.isdir(dataset_path):
+        return load_shards(dataset_path)
+    boards_path, labels_path, meta_path = cache_paths(dataset_path)
+    stamp = _source_stamp(dataset_path)
+
+    if use_cache and os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r") as f:
+                cached_stamp = json.load(f)
+            if cached_stamp == stamp:
+                boards = np.load(boards_path, mmap_mode="r")
+                labels = np.load(labels_path)
+                return boards, labels
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable dataset cache: {e}")
+
+    boards, labels = decode_dataset(dataset_path)
+
+    if use_cache:
+        try:
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            np.save(boards_path, boards)
+            np.save(labels_path, labels)
+            # The stamp is written last so a partial cache is never trusted
+            with open(meta_path, "w") as f:
+                json.dump(stamp, f)
+        except OSError as e:
+            print(f"Could not write dataset cache: {e}")
+    return boards, labels
@@ -1,12 +1,13 @@
-from connect4.game_utils import valid_move, drop_piece, check_win, COLUMN_COUNT, ROW_COUNT
+from connect4.game_utils import valid_move, drop_piece, check_win_at, COLUMN_COUNT, ROW_COUNT
 
 
 
 def block_player_move(board, player):
     for col in range(len(board[0])): 
         if valid_move(board, col):  
-            temp_board = [row.copy() for row in board]
-            row = drop_piece(temp_board, col, player)  
-            if check_win(temp_board, player):  # Check if the opponent wins
+            row = drop_piece(board, col, player)
+            wins = check_win_at(board, row, col, player)  # Check if the opponent wins
+            board[row][col] = 0  # Undo the move
+            if wins:
                 return col  # Block the winning move by returning the column
     return -1
@@ -2,50 +2,86 @@ import pygame
 import time
 import sys
 from connect4.game_utils import (
-    drop_piece, valid_move, check_win, ai_move,
+    drop_piece, valid_move, check_win_at, apply_ai_move,
     switch_turn, create_board, board_is_full, get_column_from_mouse
 )
+from connect4.ai_worker import AIMove
 from connect4.music_player import play_music, stop_music, next_track, previous_track
 from connect4.agent_utils.random_agent import random_agent
 from connect4.agent_utils.minimax_agent import minimax_agent
-from connect4.agent_utils.ml_agent import train_model
 from connect4.constants import BLACK, WHITE, WIDTH, HEIGHT, SQUARE_SIZE, ROW_COUNT, COLUMN_COUNT, RED, YELLOW, BLUE
-from connect4.graphics import draw_board
+from connect4.graphics import draw_board, draw_hover, draw_thinking, invalidate_board
 from connect4.player_data import save_player_score
 from connect4.game_help import block_player_move  # Correct import here
+from connect4.scene import FRAME_CAP, wait_events
 
 
 TURN_TIME_LIMIT = 10  # seconds
 
+# Shortest time an AI turn takes on screen, so moves can be followed
+AI_MIN_TURN_TIME = {'player_vs_ai': 1.0, 'ai_vs_ai': 2.0}
+
+# How often the loop polls a pending AI move
+POLL_FPS = 30
+
+# Dots of the "thinking" indicator per second
+THINKING_DOTS_PER_SECOND = 3
+
 def game_loop(game_mode, player1_agent, player2_agent, display_message, ask_play_again,
               main_menu, difficulty_menu, screen, player1_name, player2_name, model=None):
     """
     Main game loop for Connect 4.
     Handles different game modes, time limit per turn, player moves, AI moves, and music control.
     """
+    clock = pygame.time.Clock()
+    # A cancelled AIMove still unwinding; agents share tables, so the next move waits for it
+    stopping = None
     while True:
         board = create_board()
         running = True
         turn = 1  # Player 1 starts
+        invalidate_board()  # Menus drew over the window since the last game
         draw_board(board, turn, screen)
 
         turn_start_time = time.time()  # Start of each turn
+        pending = None  # AIMove being computed for the current turn
+        thinking_dots = -1
+        caption = None
 
         while running:
             time_left = TURN_TIME_LIMIT - int(time.time() - turn_start_time)
-            pygame.display.set_caption(f"Connect 4 - Time left: {time_left}s")
+            if time_left != caption:
+                caption = time_left
+                pygame.display.set_caption(f"Connect 4 - Time left: {time_left}s")
 
             if time_left <= 0:
                 print("Turn timed out!")
+                if pending is not None:
+                    pending.cancel()
+                    stopping = pending
+                    pending = None
                 turn = switch_turn(turn)
                 turn_start_time = time.time()
                 draw_board(board, turn, screen)
 
-            for event in pygame.event.get():
+            # Sleep until an event arrives, the countdown ticks over, or a pending AI move needs polling
+            ai_turn = game_mode == 'ai_vs_ai' or (game_mode == 'player_vs_ai' and turn == 2)
+            if ai_turn:
+                timeout_ms = 1000 / POLL_FPS
+            else:
+                timeout_ms = 1000 * (1 - (time.time() - turn_start_time) % 1)
+
+            for event in wait_events(timeout_ms):
                 if event.type == pygame.QUIT:
+                    if pending is not None:
+                        pending.cancel()
                     pygame.quit()
                     sys.exit()
 
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE) and running:
+                    invalidate_board()
+                    draw_board(board, turn, screen)
+
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_p:
                         play_music()
@@ -58,18 +94,24 @@ def game_loop(game_mode, player1_agent, player2_agent, display_message, ask_play
                     elif event.key == pygame.K_4:
                         print("Training ML agent manually...")
                         try:
+                            from connect4.agent_utils.ml_agent import train_model
                             model = train_model("connect4_dataset/connect-4.data", "connect4_dataset/connect-4.names")
                             print("Manual training complete.")
                         except Exception as e:
                             print(f"Error training ML agent: {e}")
 
+                # Only the hover strip follows the mouse
+                if event.type == pygame.MOUSEMOTION and running and pending is None:
+                    if game_mode == 'human' or (game_mode == 'player_vs_ai' and turn == 1):
+                        draw_hover(turn, screen)
+
                 # Handle mouse click for human player
                 if game_mode == 'human' and event.type == pygame.MOUSEBUTTONDOWN:
                     col = get_column_from_mouse(event)
                     if valid_move(board, col):
                         row = drop_piece(board, col, turn)
                         if row != -1:
-                            if check_win(board, turn):
+                            if check_win_at(board, row, col, turn):
                                 draw_board(board, turn, screen)
                                 winner = player1_name if turn == 1 else player2_name
                                 display_message(f"{winner} wins!")
@@ -93,7 +135,7 @@ def game_loop(game_mode, player1_agent, player2_agent, display_message, ask_play
                         if valid_move(board, col):
                             row = drop_piece(board, col, turn)
                             if row != -1:
-                                if check_win(board, turn):
+                                if check_win_at(board, row, col, turn):
                                     draw_board(board, turn, screen)
                                     display_message(f"{player1_name} wins!")
                                     save_player_score(player1_name, 1)
@@ -108,31 +150,33 @@ def game_loop(game_mode, player1_agent, player2_agent, display_message, ask_play
                                     turn = 2
                                     turn_start_time = time.time()
                                     draw_board(board, turn, screen)
-                                    pygame.time.delay(1000)
-
-                elif game_mode == 'player_vs_ai' and turn == 2:
-                    pygame.time.delay(1000)
-                    if ai_move is not None:
-                        if ai_move(board, player2_agent, turn, player2_name, screen):
-                            save_player_score(player2_name, 1)
-                            running = False
-                        else:
-                            turn = 1
-                            turn_start_time = time.time()
-                    else:
-                        print("AI move function is not available.")
 
-            # Handle AI vs AI mode
-            if game_mode == 'ai_vs_ai' and running:
-                pygame.time.delay(2000)
+            # AI turns run on a worker thread; the loop keeps polling events meanwhile
+            ai_turn = game_mode == 'ai_vs_ai' or (game_mode == 'player_vs_ai' and turn == 2)
+            if ai_turn and running:
                 agent = player1_agent if turn == 1 else player2_agent
                 label = player1_name if turn == 1 else player2_name
-                if ai_move(board, agent, turn, label, screen):
-                    save_player_score(label, 1)
-                    running = False
+                if pending is None:
+                    if stopping is None or stopping.stopped():
+                        stopping = None
+                        pending = AIMove(board, agent, turn, label)
+                        thinking_dots = -1
+                elif pending.done() and pending.elapsed() >= AI_MIN_TURN_TIME[game_mode]:
+                    col = pending.result()
+                    pending = None
+                    if apply_ai_move(board, col, turn, label, screen):
+                        save_player_score(label, 1)
+                        running = False
+                    else:
+                        turn = switch_turn(turn)
+                        turn_start_time = time.time()
                 else:
-                    turn = switch_turn(turn)
-                    turn_start_time = time.time()
+                    dots = int(pending.elapsed() * THINKING_DOTS_PER_SECOND) % 4
+                    if dots != thinking_dots:
+                        thinking_dots = dots
+                        draw_thinking(screen, label, dots)
+
+            clock.tick(FRAME_CAP)
 
             if not running:
                 if ask_play_again():
@@ -141,7 +185,7 @@ def game_loop(game_mode, player1_agent, player2_agent, display_message, ask_play
                     game_mode = main_menu()
 
                     if game_mode == 'ai_vs_ai':
-                        from connect4.agents.ml_agent import ml_agent
+                        from connect4.agent_utils.ml_agent import ml_agent
                         player1_agent = minimax_agent
                         player2_agent = ml_agent
                     elif game_mode == 'player_vs_ai':
@@ -1,13 +1,6 @@
-import random
-import numpy as np
-import pandas as pd
-from connect4.constants import SQUARE_SIZE
-from connect4.graphics import draw_board
-from sklearn.preprocessing import LabelEncoder
-from connect4.message import display_message
-
-COLUMN_COUNT = 7
-ROW_COUNT = 6
+from connect4.constants import SQUARE_SIZE, COLUMN_COUNT, ROW_COUNT
+from connect4.bitboard import has_four, piece_mask
+from connect4.instrumentation import begin_move, end_move
 
 def create_board():
     return [[0] * COLUMN_COUNT for _ in range(ROW_COUNT)]
@@ -35,30 +28,24 @@ def make_move(board, col, player):
     return None
 
 def check_win(board, piece):
-    # Horizontal check
-    for r in range(ROW_COUNT):
-        for c in range(COLUMN_COUNT - 3):
-            if all(board[r][c + i] == piece for i in range(4)):
-                return True
-
-    # Vertical check
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT - 3):
-            if all(board[r + i][c] == piece for i in range(4)):
-                return True
-
-    # Positive diagonal check
-    for r in range(ROW_COUNT - 3):
-        for c in range(COLUMN_COUNT - 3):
-            if all(board[r + i][c + i] == piece for i in range(4)):
-                return True
-
-    # Negative diagonal check
-    for r in range(3, ROW_COUNT):
-        for c in range(COLUMN_COUNT - 3):
-            if all(board[r - i][c + i] == piece for i in range(4)):
-                return True
+    return has_four(piece_mask(board, piece))
 
+def check_win_at(board, row, col, piece):
+    """
+    Checks only the lines through (row, col), for use right after a piece was dropped there.
+    """
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        count = 1
+        r, c = row + dr, col + dc
+        while 0 <= r < ROW_COUNT and 0 <= c < COLUMN_COUNT and board[r][c] == piece:
+            count += 1
+            r, c = r + dr, c + dc
+        r, c = row - dr, col - dc
+        while 0 <= r < ROW_COUNT and 0 <= c < COLUMN_COUNT and board[r][c] == piece:
+            count += 1
+            r, c = r - dr, c - dc
+        if count >= 4:
+            return True
     return False
 
 def switch_turn(turn):
@@ -81,45 +68,42 @@ def get_available_columns(board):
     return available_columns
 
 def preprocess_data(dataset_path, names_path):
-    import pandas as pd
+    from connect4.dataset import load_dataset
 
+    X, y = load_dataset(dataset_path)
     print("Dataset loaded successfully.")
-    df = pd.read_csv(dataset_path, header=None)
 
     print("Feature names loaded successfully.")
     with open(names_path, "r") as f:
         lines = f.readlines()
     feature_names = [line.strip() for line in lines if line.strip()]
 
-    if df.isnull().values.any():
-        print("Warning: Missing values found in the dataset.")
-        df = df.dropna()
-
-    print("Dataset shape after cleaning:", df.shape)
-
-    # Assuming the last column is the target label
-    X = df.iloc[:, :-1]
-    y = df.iloc[:, -1]
+    print("Dataset shape after cleaning:", (X.shape[0], X.shape[1] + 1))
 
     print("Feature conversion complete.")
     print("Data sample after conversion:")
-    print(X.head())
+    print(X[:5])
 
     return X, y
 
 def easy_ai_move(board, turn):
-    from connect4.agents.random_agent import random_agent
+    from connect4.agent_utils.random_agent import random_agent
     return random_agent(board, turn)
 
 def medium_ai_move(board, turn):
-    from connect4.agents.minimax_agent import minimax_agent
+    from connect4.agent_utils.minimax_agent import minimax_agent
     return minimax_agent(board, turn, depth=3)
 
 def hard_ai_move(board, turn, model):
-    from connect4.agents.ml_agent import ml_agent
+    from connect4.agent_utils.ml_agent import ml_agent
     return ml_agent(board, turn, model)
 
-def ai_move(board, agent, turn, label, screen):
+def choose_ai_move(board, agent, turn, label):
+    """
+    Picks a column for `agent`, blocking an immediate win by the opponent
+    first. Needs no display, so it can run off the UI thread on a copy of
+    the board. Returns None if the agent fails.
+    """
     opponent = 1 if turn == 2 else 2
     # Import block_player_move inside this function to prevent circular import
     from connect4.game_help import block_player_move
@@ -127,17 +111,27 @@ def ai_move(board, agent, turn, label, screen):
 
     # Attempt to block opponent if a blocking move is found
     if block_col != -1 and valid_move(board, block_col):
-        col = block_col
-    else:
-        try:
-            if agent.__name__ == "ml_agent":
-                col = agent(board, turn, None)  # Assuming model is None for now
-            else:
-                col = agent(board, turn)
-        except Exception as e:
-            print(f"AI move generation failed for {label}: {e}")
-            return False
-
+        return block_col
+    stats = begin_move(label, turn, board)
+    col = None
+    try:
+        if getattr(agent, "__name__", None) == "ml_agent":
+            col = agent(board, turn, None)  # Assuming model is None for now
+        else:
+            col = agent(board, turn)
+    except Exception as e:
+        print(f"AI move generation failed for {label}: {e}")
+    end_move(stats, col)
+    return col
+
+def apply_ai_move(board, col, turn, label, screen):
+    """Plays the chosen column and redraws. Returns True if the game is over."""
+    # The GUI modules are only needed here, keep them out of the core import
+    from connect4.graphics import draw_board
+    from connect4.message import display_message
+
+    if col is None:
+        return False
     try:
         col = int(float(col))
     except (ValueError, TypeError):
@@ -153,7 +147,7 @@ def ai_move(board, agent, turn, label, screen):
     if row != -1:
         draw_board(board, turn, screen)
 
-        if check_win(board, turn):
+        if check_win_at(board, row, col, turn):
             display_message(f"{label} wins!")
             return True
         elif board_is_full(board):
@@ -162,3 +156,7 @@ def ai_move(board, agent, turn, label, screen):
 
         draw_board(board, switch_turn(turn), screen)
     return False
+
+def ai_move(board, agent, turn, label, screen):
+    """Chooses and plays an AI move in one blocking call."""
+    return apply_ai_move(board, choose_ai_move(board, agent, turn, label), turn, label, screen)
@@ -1,24 +1,120 @@
 import pygame
 from connect4.constants import BLACK, WHITE, WIDTH, HEIGHT, SQUARE_SIZE, ROW_COUNT, COLUMN_COUNT, RED, YELLOW, BLUE
+from connect4.bitboard import as_board
+from connect4.scene import render_text
 
-def draw_board(board, turn, screen):
-    screen.fill(BLACK)
-    pygame.draw.rect(screen, BLUE, (0, 0, WIDTH, SQUARE_SIZE))
+# ================================
+# Board Rendering
+# ================================
+# The empty grid is rendered once and each cell state has a ready-made
+# sprite, so a move only blits the cells that changed plus the hover strip
+# and pushes just those rectangles to the display.
+
+PIECE_RADIUS = SQUARE_SIZE // 2 - 5
+HOVER_STRIP = pygame.Rect(0, 0, WIDTH, SQUARE_SIZE)
+
+# Cell contents -> disc colour; empty cells show the blue hole
+CELL_COLORS = {0: BLUE, 1: RED, 2: YELLOW}
+
+
+def cell_rect(row, col):
+    return pygame.Rect(col * SQUARE_SIZE, (row + 1) * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+
+
+class BoardRenderer:
+    """Draws boards onto `screen`, redrawing only what changed since the last call."""
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.background.fill(BLACK)
+        pygame.draw.rect(self.background, BLUE, HOVER_STRIP)
+        self.sprites = {}
+        for piece, color in CELL_COLORS.items():
+            sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE)).convert()
+            sprite.fill(BLACK)
+            pygame.draw.circle(sprite, color, (SQUARE_SIZE // 2, SQUARE_SIZE // 2), PIECE_RADIUS)
+            self.sprites[piece] = sprite
+            # The background carries the empty grid
+            if piece == 0:
+                for row in range(ROW_COUNT):
+                    for col in range(COLUMN_COUNT):
+                        self.background.blit(sprite, cell_rect(row, col))
+        self.invalidate()
+
+    def invalidate(self):
+        """Forgets what is on screen, so the next draw repaints everything."""
+        self.cells = None
+        self.hover = None
+
+    def invalidate_hover(self):
+        self.hover = None
+
+    def draw(self, board, turn):
+        board = as_board(board)
+        if self.cells is None:
+            self.screen.blit(self.background, (0, 0))
+            self.cells = [[0] * COLUMN_COUNT for _ in range(ROW_COUNT)]
+            dirty = [self.screen.get_rect()]
+        else:
+            dirty = []
 
-    # Draw all pieces on the board
-    for row in range(ROW_COUNT):
-        for col in range(COLUMN_COUNT):
-            pygame.draw.circle(screen, BLUE, (col * SQUARE_SIZE + SQUARE_SIZE // 2, (row + 1) * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 2 - 5)
-            if board[row][col] == 1:
-                pygame.draw.circle(screen, RED, (col * SQUARE_SIZE + SQUARE_SIZE // 2, (row + 1) * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 2 - 5)
-            elif board[row][col] == 2:
-                pygame.draw.circle(screen, YELLOW, (col * SQUARE_SIZE + SQUARE_SIZE // 2, (row + 1) * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 2 - 5)
+        for row in range(ROW_COUNT):
+            drawn = self.cells[row]
+            for col, piece in enumerate(board[row]):
+                if drawn[col] != piece:
+                    rect = cell_rect(row, col)
+                    self.screen.blit(self.sprites[piece], rect)
+                    drawn[col] = piece
+                    dirty.append(rect)
+
+        dirty.extend(self.draw_hover(turn, update=False))
+        if dirty:
+            pygame.display.update(dirty)
+
+    def draw_hover(self, turn, update=True):
+        """Moves the hover disc to the column under the mouse; returns the changed rectangles."""
+        col = min(max(pygame.mouse.get_pos()[0] // SQUARE_SIZE, 0), COLUMN_COUNT - 1)
+        if self.hover == (col, turn):
+            return []
+        self.hover = (col, turn)
+        self.screen.blit(self.background, HOVER_STRIP, HOVER_STRIP)
+        hover_color = YELLOW if turn == 1 else RED
+        pygame.draw.circle(self.screen, hover_color, (col * SQUARE_SIZE + SQUARE_SIZE // 2, SQUARE_SIZE // 2), PIECE_RADIUS)
+        if update:
+            pygame.display.update(HOVER_STRIP)
+        return [HOVER_STRIP]
+
+
+# One renderer per window, created on the first draw
+_renderer = None
+
+
+def get_renderer(screen):
+    global _renderer
+    if _renderer is None or _renderer.screen is not screen:
+        _renderer = BoardRenderer(screen)
+    return _renderer
+
+
+def invalidate_board():
+    """Call after drawing over the board (messages, menus) so the next draw_board repaints it all."""
+    if _renderer is not None:
+        _renderer.invalidate()
+
+
+def draw_board(board, turn, screen):
+    get_renderer(screen).draw(board, turn)
 
-    # Hover effect for current turn piece
-    hover_color = YELLOW if turn == 1 else RED
-    hover_x = pygame.mouse.get_pos()[0] // SQUARE_SIZE * SQUARE_SIZE + SQUARE_SIZE // 2
-    pygame.draw.circle(screen, hover_color, (hover_x, SQUARE_SIZE // 2), SQUARE_SIZE // 2 - 5)
 
-    pygame.display.flip()
+def draw_hover(turn, screen):
+    get_renderer(screen).draw_hover(turn)
 
 
+def draw_thinking(screen, label, dots):
+    """Replaces the hover strip with an animated "thinking" message and updates only that strip."""
+    get_renderer(screen).invalidate_hover()
+    pygame.draw.rect(screen, BLUE, HOVER_STRIP)
+    text = render_text(f"{label} is thinking" + "." * dots)
+    screen.blit(text, (WIDTH // 2 - text.get_width() // 2, SQUARE_SIZE // 2 - text.get_height() // 2))
+    pygame.display.update(HOVER_STRIP)
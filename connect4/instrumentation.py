@@ -0,0 +1,178 @@
+"""
+Opt-in per-move cost counters for the agents.
+
+Nothing is collected unless a recorder is enabled, either with enable()
+(the arena's --stats flag does this) or by starting the GUI with
+CONNECT4_STATS=path. While a move is being chosen its SearchStats is the
+thread's active stats object; agents fetch it once per move with
+active_stats() and fill it in. With no recorder active_stats() returns
+None and the search runs exactly as before, except for one None check at
+each leaf and cutoff.
+
+Each move becomes one record, written as JSON lines, or as CSV when the
+path ends in .csv.
+"""
+import os
+import csv
+import json
+import time
+import threading
+
+# Environment variable the GUI reads to turn recording on
+STATS_ENV = "CONNECT4_STATS"
+
+FIELDS = (
+    "agent", "player", "ply", "column", "move_time", "inference_time", "depth",
+    "nodes", "leaf_evals", "interior_nodes", "branching_factor", "cutoffs_by_ply",
+    "tt_probes", "tt_hits",
+)
+
+
+class SearchStats:
+    """Counters for one move. Plies in cutoffs_by_ply count from the root."""
+
+    __slots__ = (
+        "agent", "player", "ply", "column", "move_time", "inference_time", "depth",
+        "nodes", "leaf_evals", "interior_nodes", "children", "cutoffs_by_ply",
+        "tt_probes", "tt_hits", "root_moves", "started",
+    )
+
+    def __init__(self, agent=None, player=None, ply=0):
+        self.agent = agent
+        self.player = player
+        self.ply = ply
+        self.column = None
+        self.move_time = None
+        self.inference_time = None
+        self.depth = None
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.interior_nodes = 0
+        self.children = 0
+        self.cutoffs_by_ply = []
+        self.tt_probes = 0
+        self.tt_hits = 0
+        # Stones on the board at the search root
+        self.root_moves = ply
+        self.started = time.perf_counter()
+
+    def expanded(self, children):
+        self.interior_nodes += 1
+        self.children += children
+
+    def cutoff(self, moves):
+        ply = moves - self.root_moves
+        while len(self.cutoffs_by_ply) <= ply:
+            self.cutoffs_by_ply.append(0)
+        self.cutoffs_by_ply[ply] += 1
+
+    def table_snapshot(self, tt):
+        return tt.hits, tt.hits + tt.misses + tt.collisions
+
+    def add_table_usage(self, tt, snapshot):
+        hits, probes = self.table_snapshot(tt)
+        self.tt_hits += hits - snapshot[0]
+        self.tt_probes += probes - snapshot[1]
+
+    def to_dict(self):
+        return {
+            "agent": self.agent,
+            "player": self.player,
+            "ply": self.ply,
+            "column": self.column,
+            "move_time": self.move_time,
+            "inference_time": self.inference_time,
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "leaf_evals": self.leaf_evals,
+            "interior_nodes": self.interior_nodes,
+            "branching_factor": self.children / self.interior_nodes if self.interior_nodes else None,
+            "cutoffs_by_ply": list(self.cutoffs_by_ply),
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+        }
+
+
+class StatsRecorder:
+    """Appends move records to a JSON lines or CSV file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.csv = path.endswith(".csv")
+        self.lock = threading.Lock()
+        write_header = self.csv and (not os.path.exists(path) or os.path.getsize(path) == 0)
+        self.file = open(path, "a", newline="")
+        if self.csv:
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if write_header:
+                self.writer.writeheader()
+
+    def write(self, record):
+        with self.lock:
+            if self.csv:
+                row = dict(record)
+                row["cutoffs_by_ply"] = " ".join(str(n) for n in record["cutoffs_by_ply"])
+                self.writer.writerow({field: row.get(field) for field in FIELDS})
+            else:
+                self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+recorder = None
+_local = threading.local()
+
+
+def enable(path):
+    global recorder
+    disable()
+    recorder = StatsRecorder(path)
+    return recorder
+
+
+def enable_from_env():
+    path = os.environ.get(STATS_ENV)
+    if path:
+        enable(path)
+        print(f"Recording agent stats to {path}")
+
+
+def disable():
+    global recorder
+    if recorder is not None:
+        recorder.close()
+    recorder = None
+
+
+def active_stats():
+    """The stats object for the move being chosen on this thread, or None."""
+    return getattr(_local, "stats", None)
+
+
+def begin_move(agent, player, board, collect=False):
+    """
+    Starts collecting for one move if a recorder is enabled (or `collect` is
+    set); returns the SearchStats, or None when disabled.
+    """
+    if recorder is None and not collect:
+        return None
+    ply = sum(1 for row in board for cell in row if cell != 0)
+    stats = SearchStats(agent, player, ply)
+    _local.stats = stats
+    return stats
+
+
+def end_move(stats, column):
+    """Finishes a move started by begin_move and returns its record."""
+    if stats is None:
+        return None
+    _local.stats = None
+    stats.move_time = time.perf_counter() - stats.started
+    stats.column = column
+    record = stats.to_dict()
+    if recorder is not None:
+        recorder.write(record)
+    return record
@@ -0,0 +1,107 @@
+from connect4.constants import COLUMN_COUNT, ROW_COUNT
+
+# ================================
+# Precomputed Line Index
+# ================================
+# Every window of the board as a tuple of flat cell indices (row * COLUMN_COUNT + col,
+# row 0 at the top as on list boards). A window's contents are encoded as a
+# base-3 number, cell i contributing piece * 3**i, so scoring a window is a
+# single lookup in a table built once per player.
+
+
+def _windows(length, dr, dc):
+    rows = range(length - 1, ROW_COUNT) if dr < 0 else range(ROW_COUNT - (length - 1) * dr)
+    windows = []
+    for r in rows:
+        for c in range(COLUMN_COUNT - (length - 1) * dc):
+            windows.append(tuple((r + i * dr) * COLUMN_COUNT + c + i * dc for i in range(length)))
+    return tuple(windows)
+
+
+def _by_column(windows):
+    return tuple(sorted(windows, key=lambda window: (window[0] % COLUMN_COUNT, window[0])))
+
+
+# Four-cell windows, in the order minimax_agent.evaluate_board visits them
+HORIZONTAL_4 = _windows(4, 0, 1)
+VERTICAL_4 = _by_column(_windows(4, 1, 0))
+POSITIVE_DIAGONAL_4 = _windows(4, 1, 1)
+NEGATIVE_DIAGONAL_4 = _windows(4, -1, 1)
+WINDOWS_4 = HORIZONTAL_4 + VERTICAL_4 + POSITIVE_DIAGONAL_4 + NEGATIVE_DIAGONAL_4
+
+# Three-cell setup windows used by smart_agent
+HORIZONTAL_3 = _windows(3, 0, 1)
+VERTICAL_3 = _by_column(_windows(3, 1, 0))
+DIAGONAL_3 = _windows(3, 1, 1) + _windows(3, -1, 1)
+
+
+def _cell_windows(windows):
+    cells = [[] for _ in range(ROW_COUNT * COLUMN_COUNT)]
+    for number, window in enumerate(windows):
+        for position, cell in enumerate(window):
+            cells[cell].append((number, 3 ** position))
+    return tuple(tuple(entries) for entries in cells)
+
+
+# For each cell: (window number, base-3 place value of the cell in that window)
+CELL_WINDOWS_4 = _cell_windows(WINDOWS_4)
+
+
+def encode(cells, window):
+    """Base-3 code of `window` on a flattened board."""
+    code = 0
+    for cell in reversed(window):
+        code = code * 3 + cells[cell]
+    return code
+
+
+def flatten(board):
+    return [cell for row in board for cell in row]
+
+
+def _decode(code, length):
+    pieces = []
+    for _ in range(length):
+        pieces.append(code % 3)
+        code //= 3
+    return pieces
+
+
+def _window_score(window, player):
+    # Same rules as minimax_agent.evaluate_window
+    opp_player = 3 - player
+    if window.count(player) == 4:
+        return 100
+    elif window.count(player) == 3 and window.count(0) == 1:
+        return 5
+    elif window.count(player) == 2 and window.count(0) == 2:
+        return 2
+    elif window.count(opp_player) == 3 and window.count(0) == 1:
+        return -4
+    elif window.count(opp_player) == 2 and window.count(0) == 2:
+        return -2
+    return 0
+
+
+def _is_setup(window, player):
+    # Same rule as smart_agent.check_horizontal/vertical/diagonal
+    return window.count(player) == 2 and window.count(0) == 1
+
+
+# SCORE_4[player - 1][code]: evaluate_window score of a four-cell window
+SCORE_4 = tuple(tuple(_window_score(_decode(code, 4), player) for code in range(3 ** 4)) for player in (1, 2))
+
+# SETUP_3[player - 1][code]: True if a three-cell window is two of `player` and one empty
+SETUP_3 = tuple(tuple(_is_setup(_decode(code, 3), player) for code in range(3 ** 3)) for player in (1, 2))
+
+
+def score_windows(cells, player):
+    """Sum of SCORE_4 over every four-cell window of a flattened board."""
+    table = SCORE_4[player - 1]
+    return sum(table[cells[a] + 3 * cells[b] + 9 * cells[c] + 27 * cells[d]] for a, b, c, d in WINDOWS_4)
+
+
+def has_setup(cells, windows, player):
+    """True if any of the three-cell `windows` is a setup for `player`."""
+    table = SETUP_3[player - 1]
+    return any(table[cells[a] + 3 * cells[b] + 9 * cells[c]] for a, b, c in windows)
@@ -7,13 +7,16 @@ from connect4.music_player import play_music, stop_music, next_track, previous_t
 from connect4.agent_utils.smart_agent import smart_agent
 from connect4.agent_utils.random_agent import random_agent
 from connect4.agent_utils.minimax_agent import minimax_agent
+from connect4.agent_utils.solver import solver_agent
+from connect4.agent_utils.mcts_agent import mcts_agent
 
 # Import the ML agent properly
 try:
-    from connect4.agent_utils.ml_agent import train_model, ml_agent
+    from connect4.agent_utils.ml_agent import load_model, train_model_in_background, ml_agent
 except ImportError as e:
     print(f"Error importing ML Agent: {e}")
-    train_model = None
+    load_model = None
+    train_model_in_background = None
     ml_agent = None
 
 # Game logic and utilities
@@ -24,10 +27,14 @@ from connect4.constants import screen, WIDTH, HEIGHT, YELLOW, RED, BLACK, WHITE
 from connect4.message import display_message, ask_play_again
 from connect4.game_help import block_player_move, drop_piece
 from connect4.player_data import save_player_score, display_scoreboard
+from connect4.scene import REDRAW, blit_centered, run_scene, show_menu
+from connect4.instrumentation import enable_from_env
 
 pygame.init()
 pygame.display.set_caption("Connect 4")
-font = pygame.font.SysFont("Arial", 40)
+
+# Per-move agent stats, when CONNECT4_STATS names an output file
+enable_from_env()
 
 # Initialize game board and turn
 board = [[0 for _ in range(7)] for _ in range(6)]
@@ -40,134 +47,109 @@ names_path = os.path.join(os.path.dirname(__file__), "connect4_dataset", "connec
 
 # Function to register player
 def register_player():
-    while True:
-        screen.fill(BLACK)
-        text = font.render("Do you want to register your name? (Y/N)", True, WHITE)
-        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 3))
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_y:
-                    return input_player_name()
-                elif event.key == pygame.K_n:
-                    return None
+    register = show_menu(["Do you want to register your name? (Y/N)"], {pygame.K_y: True, pygame.K_n: False})
+    return input_player_name() if register else None
 
 
 # Function to input player name
 def input_player_name():
     name = ""
-    input_active = True
 
-    while input_active:
+    def draw(screen):
         screen.fill(BLACK)
-        prompt = font.render("Enter your name:", True, WHITE)
-        screen.blit(prompt, (WIDTH // 2 - prompt.get_width() // 2, HEIGHT // 3))
-
-        typed = font.render(name, True, WHITE)
-        screen.blit(typed, (WIDTH // 2 - typed.get_width() // 2, HEIGHT // 2))
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    return name
-                elif event.key == pygame.K_BACKSPACE:
-                    name = name[:-1]
-                else:
-                    name += event.unicode
+        blit_centered(screen, "Enter your name:", HEIGHT // 3)
+        if name:
+            blit_centered(screen, name, HEIGHT // 2)
+
+    def handle_event(event):
+        nonlocal name
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN:
+                return name
+            elif event.key == pygame.K_BACKSPACE:
+                name = name[:-1]
+            else:
+                name += event.unicode
+            return REDRAW
+
+    return run_scene(draw, handle_event)
 
 
 # Main menu function
 def main_menu():
-    while True:
-        screen.fill(BLACK)
-
-        options = [
-            "Press 1 for 2-Player Game",
-            "Press 2 for AI vs AI",
-            "Press 3 for Player vs AI"
-        ]
-
-        for i, option in enumerate(options):
-            text = font.render(option, True, WHITE)
-            screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 3 + i * 60))
-
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_1:
-                    return 'human'
-                elif event.key == pygame.K_2:
-                    return 'ai_vs_ai'
-                elif event.key == pygame.K_3:
-                    return 'player_vs_ai'
+    options = [
+        "Press 1 for 2-Player Game",
+        "Press 2 for AI vs AI",
+        "Press 3 for Player vs AI"
+    ]
+    return show_menu(options, {
+        pygame.K_1: 'human',
+        pygame.K_2: 'ai_vs_ai',
+        pygame.K_3: 'player_vs_ai',
+    })
 
 
 # Difficulty menu function
 def difficulty_menu():
-    while True:
-        screen.fill(BLACK)
+    difficulties = [
+        "Press 1 for Easy (Random Agent)",
+        "Press 2 for Medium (Smart Agent)",
+        "Press 3 for Hard (Minimax Agent)",
+        "Press 4 for ML Agent (Advanced AI)",
+        "Press 5 for Expert (Solver + Minimax)",
+        "Press 6 for MCTS Agent (Monte Carlo)"
+    ]
+    choice = show_menu(difficulties, {
+        pygame.K_1: 'random',
+        pygame.K_2: 'smart',
+        pygame.K_3: 'minimax',
+        pygame.K_4: 'ml',
+        pygame.K_5: 'solver',
+        pygame.K_6: 'mcts',
+    })
+    if choice == 'random':
+        return random_agent
+    elif choice == 'smart':
+        return smart_agent
+    elif choice == 'minimax':
+        return minimax_agent
+    elif choice == 'ml':
+        if model:
+            return lambda board, turn: ml_agent(board, turn, model)
+        else:
+            print("ML model unavailable. Falling back to Minimax agent.")
+            return minimax_agent
+    elif choice == 'mcts':
+        # The ML model, when it is ready, guides the first moves of the search
+        return lambda board, turn: mcts_agent(board, turn, model=model)
+    return solver_agent
+
 
-        difficulties = [
-            "Press 1 for Easy (Random Agent)",
-            "Press 2 for Medium (Smart Agent)",
-            "Press 3 for Hard (Minimax Agent)",
-            "Press 4 for ML Agent (Advanced AI)"
-        ]
-
-        for i, option in enumerate(difficulties):
-            text = font.render(option, True, WHITE)
-            screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 3 + i * 60))
-
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_1:
-                    return random_agent
-                elif event.key == pygame.K_2:
-                    return smart_agent
-                elif event.key == pygame.K_3:
-                    return minimax_agent
-                elif event.key == pygame.K_4:
-                    if model:
-                        return lambda board, turn: ml_agent(board, turn, model)
-                    else:
-                        print("ML model unavailable. Falling back to Minimax agent.")
-                        return minimax_agent
+# Called from the training thread once a freshly trained model is ready
+def on_model_trained(trained_model):
+    global model
+    if trained_model is not None:
+        model = trained_model
+        print("ML model trained successfully.")
 
 
 # Main program execution
 if __name__ == "__main__":
-    player_name = register_player()
-    if player_name:
-        print(f"Player registered with name: {player_name}")
-
-    # ML model training
+    # ML model: reuse the cached artifact, retraining in the background only if it is stale.
+    # CONNECT4_ML_MODEL=sgd picks the out-of-core model instead of the forest.
     model = None
-    if train_model:
-        try:
-            model = train_model(dataset_path, names_path)
-            print("ML model trained successfully.")
-        except Exception as e:
-            print(f"Error training ML model: {e}")
+    if load_model:
+        model = load_model(dataset_path)
+        if model is None:
+            print("Training ML model in the background...")
+            train_model_in_background(dataset_path, names_path, on_model_trained)
     else:
         print("ML training function not available.")
 
+    player_name = register_player()
+    if player_name:
+        print(f"Player registered with name: {player_name}")
+
     game_mode = main_menu()
 
     player1_agent = None
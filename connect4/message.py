@@ -1,53 +1,41 @@
-import sys
 import pygame
+from connect4.graphics import invalidate_board
+from connect4.scene import render_text, run_scene
 
-pygame.font.init()
-
-# Font object to be used in all functions
-font = pygame.font.SysFont("Arial", 40)
+def _draw_centered(text):
+    def draw(screen):
+        screen.fill((0, 0, 0))
+        # Position the text in the center of the screen
+        surface = render_text(text)
+        screen.blit(surface, (screen.get_width() // 2 - surface.get_width() // 2,
+                              screen.get_height() // 2 - surface.get_height() // 2))
+    return draw
 
 def display_message(message):
-    screen = pygame.display.get_surface() 
-    screen.fill((0, 0, 0))  
-    
-    text = font.render(message, True, (255, 255, 255))  
-    
-    # Position the text in the center of the screen
-    screen.blit(text, (screen.get_width() // 2 - text.get_width() // 2, 
-                      screen.get_height() // 2 - text.get_height() // 2))
-    
-    pygame.display.flip()  
-    pygame.time.wait(2000)  
+    invalidate_board()
+    # Stays up for two seconds while still answering window events
+    run_scene(_draw_centered(message), duration=2)
 
 def ask_play_again():
-    while True:
-        screen = pygame.display.get_surface()
-        screen.fill((0, 0, 0))  
-        
-        # Render "Play Again?" text
-        text = font.render("Play Again? (Y/N)", True, (255, 255, 255))
-        screen.blit(text, (screen.get_width() // 2 - text.get_width() // 2,
-                           screen.get_height() // 2 - text.get_height() // 2))
-        
-        pygame.display.flip()  
+    invalidate_board()
+
+    def handle_event(event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_y:
+                return True  # Continue playing
+            if event.key == pygame.K_n:
+                return False  # Go back to the main menu
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_y:
-                    return True  # Continue playing
-                if event.key == pygame.K_n:
-                    return False  # Go back to the main menu
+    return run_scene(_draw_centered("Play Again? (Y/N)"), handle_event)
 
 def ai_move_wrapper(board, agent, turn, label, screen):
     # Import the necessary functions *inside* the function to prevent circular import
     from connect4.game_utils import (
-        block_player_move, drop_piece, check_win,
-        draw_board, board_is_full, switch_turn,
+        drop_piece, check_win_at, board_is_full, switch_turn,
         easy_ai_move, medium_ai_move, hard_ai_move, ai_move
     )
+    from connect4.game_help import block_player_move
+    from connect4.graphics import draw_board
 
     opponent = 1 if turn == 2 else 2
     block_col = block_player_move(board, opponent)
@@ -63,7 +51,7 @@ def ai_move_wrapper(board, agent, turn, label, screen):
     row = drop_piece(board, col, turn)  # ← fixed bug: used block_col before, now using `col`
 
     if row != -1:
-        if check_win(board, turn):
+        if check_win_at(board, row, col, turn):
             draw_board(board, turn, screen)  
             display_message(f"{label} wins!")
             return True
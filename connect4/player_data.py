@@ -1,33 +1,151 @@
-import json
 import os
+import json
+import time
+import atexit
+import sqlite3
 
-DATA_FILE = "player_data.json"
+# ================================
+# Player Score Store (SQLite)
+# ================================
+# Scores live in an SQLite database in WAL mode, so any number of processes
+# (the GUI, arena workers) can record results at once without losing
+# updates. Results are buffered per process and written in one transaction
+# per batch. The first connection imports the old JSON file.
 
-# Ensure the JSON file exists
-def init_data_file():
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "w") as f:
-            json.dump({}, f)
+DATA_FILE = "player_data.json"  # Legacy store, migrated on first use
+DB_FILE = "player_data.db"
+
+SCHEMA_VERSION = 1
+
+# Buffered results are written once there are this many, or this many seconds after the last write
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 1.0
+
+# Milliseconds a writer waits for another process's transaction to finish
+BUSY_TIMEOUT_MS = 30_000
+
+
+def _connect(db_file):
+    conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps committed data safe from crashes at NORMAL; only an OS crash can drop the last batch
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _migrate(conn, data_file):
+    """Creates the schema and imports `data_file`, once per database."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.execute("CREATE TABLE IF NOT EXISTS players (name TEXT PRIMARY KEY, wins REAL NOT NULL DEFAULT 0)")
+            conn.execute("CREATE INDEX IF NOT EXISTS players_by_wins ON players (wins DESC, name)")
+            if data_file and os.path.exists(data_file):
+                with open(data_file, "r") as f:
+                    data = json.load(f)
+                conn.executemany(
+                    "INSERT INTO players (name, wins) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET wins = wins + excluded.wins",
+                    [(name, stats.get("wins", 0)) for name, stats in data.items()],
+                )
+                print(f"Imported {len(data)} players from {data_file}")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _as_number(wins):
+    # Draws are worth half a win; show whole numbers without the ".0"
+    return int(wins) if wins == int(wins) else wins
 
-# Register or update a player's win count
-def save_player_score(player_name, score):
-    init_data_file()
-    with open(DATA_FILE, "r") as f:
-        data = json.load(f)
 
-    if player_name in data:
-        data[player_name]["wins"] += score
-    else:
-        data[player_name] = {"wins": score}
+class ScoreStore:
+    """Buffered writer and reader for one score database."""
 
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    def __init__(self, db_file=DB_FILE, data_file=DATA_FILE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.db_file = db_file
+        self.data_file = data_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.pending_count = 0
+        self.last_flush = time.monotonic()
+        self._conn = None
+        self._pid = None
 
-# Get all player scores
+    @property
+    def conn(self):
+        # A connection must not cross a fork, so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = _connect(self.db_file)
+            self._pid = os.getpid()
+            self.pending = {}
+            self.pending_count = 0
+            _migrate(self._conn, self.data_file)
+            # Pool workers leave through multiprocessing's exit hooks rather than atexit
+            from multiprocessing import util
+            util.Finalize(None, self.close, exitpriority=10)
+        return self._conn
+
+    def record(self, player_name, score):
+        conn = self.conn
+        self.pending[player_name] = self.pending.get(player_name, 0) + score
+        self.pending_count += 1
+        if self.pending_count >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush(conn)
+
+    def flush(self, conn=None):
+        """Writes every buffered result in one transaction."""
+        if not self.pending:
+            return
+        conn = conn or self.conn
+        rows = list(self.pending.items())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO players (name, wins) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET wins = wins + excluded.wins",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.pending = {}
+        self.pending_count = 0
+        self.last_flush = time.monotonic()
+
+    def leaderboard(self, limit=None):
+        """(name, wins) pairs, best first, read through the wins index."""
+        self.flush()
+        query = "SELECT name, wins FROM players ORDER BY wins DESC, name"
+        if limit is not None:
+            rows = self.conn.execute(query + " LIMIT ?", (limit,)).fetchall()
+        else:
+            rows = self.conn.execute(query).fetchall()
+        return [(name, _as_number(wins)) for name, wins in rows]
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self.flush()
+            self._conn.close()
+        self._conn = None
+
+
+# Shared by every caller in this process
+store = ScoreStore()
+atexit.register(store.close)
+
+
+# Register or update a player's win count
+def save_player_score(player_name, score):
+    store.record(player_name, score)
+
+# Get all player scores, best first
 def get_scoreboard():
-    init_data_file()
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+    return {name: {"wins": wins} for name, wins in store.leaderboard()}
 
 
 # connect4/player_data.py
@@ -40,11 +158,8 @@ def register_player(player_num):
 
 
 # Display the scoreboard sorted by score
-def display_scoreboard():
-    scoreboard = get_scoreboard()
-    sorted_scores = sorted(scoreboard.items(), key=lambda x: x[1]["wins"], reverse=True)
-
+def display_scoreboard(limit=None):
     print("\n===== SCOREBOARD =====")
-    for i, (name, stats) in enumerate(sorted_scores, 1):
-        print(f"{i}. {name} - {stats['wins']} wins")
+    for i, (name, wins) in enumerate(store.leaderboard(limit), 1):
+        print(f"{i}. {name} - {wins} wins")
     print("======================\n")
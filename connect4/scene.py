@@ -0,0 +1,122 @@
+import sys
+import time
+import pygame
+from connect4.constants import WIDTH, HEIGHT, BLACK, WHITE
+
+# ================================
+# Event-Driven Screens
+# ================================
+# Every menu and prompt is a scene: a draw function and an event handler.
+# run_scene draws once, then sleeps in pygame.event.wait until something
+# happens, and only draws again when the handler asks for it, so an idle
+# screen costs next to no CPU. Rendered text is cached, since the same
+# menu lines are drawn over and over.
+
+# Upper bound on redraws per second for any screen
+FRAME_CAP = 30
+
+# Returned by an event handler to ask for a redraw without leaving the scene
+REDRAW = object()
+
+# Font object to be used in all screens, created on first use
+font = None
+
+# (text, color) -> rendered surface
+_text_cache = {}
+TEXT_CACHE_SIZE = 256
+
+
+def get_font():
+    global font
+    if font is None:
+        pygame.font.init()
+        font = pygame.font.SysFont("Arial", 40)
+    return font
+
+
+def render_text(text, color=WHITE):
+    key = (text, color)
+    surface = _text_cache.get(key)
+    if surface is None:
+        if len(_text_cache) >= TEXT_CACHE_SIZE:
+            _text_cache.clear()
+        surface = get_font().render(text, True, color)
+        _text_cache[key] = surface
+    return surface
+
+
+def blit_centered(screen, text, y, color=WHITE):
+    surface = render_text(text, color)
+    screen.blit(surface, (WIDTH // 2 - surface.get_width() // 2, y))
+
+
+def quit_game():
+    pygame.quit()
+    sys.exit()
+
+
+def wait_events(timeout_ms=None):
+    """
+    Blocks until at least one event arrives (or `timeout_ms` passes) and
+    returns every pending event.
+    """
+    if timeout_ms is None:
+        first = pygame.event.wait()
+    else:
+        first = pygame.event.wait(max(1, int(timeout_ms)))
+    events = [] if first.type == pygame.NOEVENT else [first]
+    events.extend(pygame.event.get())
+    return events
+
+
+def run_scene(draw, handle_event=None, duration=None):
+    """
+    Shows a scene until `handle_event(event)` returns something other than
+    None or REDRAW, and returns that. With `duration` (seconds) the scene
+    also ends by itself, returning None. Closing the window quits the game.
+    """
+    screen = pygame.display.get_surface()
+    clock = pygame.time.Clock()
+    end = time.time() + duration if duration is not None else None
+    dirty = True
+    while True:
+        if dirty:
+            draw(screen)
+            pygame.display.flip()
+            dirty = False
+            clock.tick(FRAME_CAP)
+
+        timeout_ms = None
+        if end is not None:
+            timeout_ms = (end - time.time()) * 1000
+            if timeout_ms <= 0:
+                return None
+        for event in wait_events(timeout_ms):
+            if event.type == pygame.QUIT:
+                quit_game()
+            if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                dirty = True
+            if handle_event is None:
+                continue
+            result = handle_event(event)
+            if result is REDRAW:
+                dirty = True
+            elif result is not None:
+                return result
+
+
+def show_menu(lines, choices, top=HEIGHT // 3, spacing=60):
+    """
+    Shows `lines` centered on a black screen and waits for one of the keys
+    in `choices` (key -> value); returns that key's value.
+    """
+    def draw(screen):
+        screen.fill(BLACK)
+        for i, line in enumerate(lines):
+            blit_centered(screen, line, top + i * spacing)
+
+    def handle_event(event):
+        if event.type == pygame.KEYDOWN and event.key in choices:
+            return choices[event.key]
+
+    return run_scene(draw, handle_event)
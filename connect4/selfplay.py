@@ -0,0 +1,287 @@
+"""
+Self-play training data for ml_agent.
+
+    python -m connect4.selfplay --out connect4/connect4_dataset/selfplay --agents mcts minimax --games 5000
+
+Games between every ordered pairing of --agents (mirror matches included)
+are played over a process pool, each opening with --opening-moves random
+moves so deterministic agents still reach varied positions. Every position
+before a move is labelled from the first player's point of view: 1 win,
+0 draw, -1 loss. The label is the game's result, or with --label search
+the weak solver's verdict, falling back to the result when the solver
+runs out of nodes.
+
+Positions are deduplicated across the whole run by their canonical key
+(the smaller of the key and its mirror's key). They are streamed into
+compressed .npz shards of --shard-size positions, each holding:
+
+    boards  uint8 (N, 42)  UCI connect-4.data layout: column-major from
+                           the bottom, 1 = first player, 2 = second
+    labels  int8  (N,)
+    ply     uint8 (N,)     stones on the board
+    move    int8  (N,)     column played from the position
+    keys    uint64 (N,)    canonical key
+
+Shards are written under a temporary name and then renamed. manifest.json
+lists the finished shards and how many games they cover, so an
+interrupted run continues from there when started again with the same
+settings. Pass the output directory to train_model as the dataset.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.bitboard import COLUMN_COUNT, ROW_COUNT, COLUMN_HEIGHT, Position, board_from_position
+from connect4.dataset import SHARD_MANIFEST, load_shard
+from connect4.agent_utils.opening_book import canonical_key
+
+DEFAULT_SHARD_SIZE = 50_000
+DEFAULT_OPENING_MOVES = 4
+DEFAULT_NODE_BUDGET = 20_000
+LAYOUT_VERSION = 1
+
+# Games handed to the pool at a time, so a long run never queues every task up front
+BLOCK_GAMES = 256
+
+# Bit index of each UCI feature (a1, a2, ..., g6)
+UCI_BITS = tuple(col * COLUMN_HEIGHT + row for col in range(COLUMN_COUNT) for row in range(ROW_COUNT))
+
+# Settings that must match for a run to be resumed
+RUN_SETTINGS = ("agents", "seed", "label", "opening_moves", "minimax_depth", "mcts_iterations")
+
+
+def encode_position(pos):
+    """42 uint8 cells in the UCI layout."""
+    first, second = pos.boards
+    return bytes(1 if first >> bit & 1 else 2 if second >> bit & 1 else 0 for bit in UCI_BITS)
+
+
+# ================================
+# Workers
+# ================================
+
+_solver = None
+
+
+def search_label(current, mask, moves, node_budget):
+    """Weak solver verdict for the first player, or None past the node budget."""
+    global _solver
+    from connect4.agent_utils.solver import Solver, NodeBudgetExceeded
+    if _solver is None:
+        _solver = Solver(tt_size=1 << 20)
+    _solver.node_budget = node_budget
+    _solver.nodes = 0
+    try:
+        score = _solver.solve_masks(current, mask, moves, weak=True)
+    except NodeBudgetExceeded:
+        return None
+    sign = (score > 0) - (score < 0)
+    # `current` belongs to the side to move, which is the first player on even plies
+    return sign if moves % 2 == 0 else -sign
+
+
+def play_selfplay_game(task):
+    """
+    Plays one game. `task` is (index, first, second, seed, options); returns
+    (index, boards, keys, ply, move, labels) with one entry per position.
+    """
+    from connect4.arena import get_agent, reset_search_state
+
+    index, first, second, seed, options = task
+    random.seed(seed)
+    agents = {1: get_agent(first, options), 2: get_agent(second, options)}
+    reset_search_state((first, second))
+
+    pos = Position()
+    piece = 1
+    result = 0
+    boards, keys, plies, moves, masks = [], [], [], [], []
+    while True:
+        legal = pos.legal_moves()
+        if not legal:
+            break
+        col = None
+        if pos.moves >= options["opening_moves"]:
+            try:
+                col = agents[piece](board_from_position(pos), piece)
+            except Exception as e:
+                print(f"{first if piece == 1 else second} raised {e!r}, playing randomly", file=sys.stderr)
+        if col is None or int(col) not in legal:
+            col = random.choice(legal)
+        col = int(col)
+
+        boards.append(encode_position(pos))
+        keys.append(canonical_key(pos.boards[0], pos.mask))
+        plies.append(pos.moves)
+        moves.append(col)
+        masks.append((pos.boards[piece - 1], pos.mask))
+
+        won = pos.is_winning_move(col, piece)
+        pos.play(col, piece)
+        if won:
+            result = 1 if piece == 1 else -1
+            break
+        piece = 3 - piece
+
+    labels = [result] * len(boards)
+    if options["label"] == "search":
+        for i, (current, mask) in enumerate(masks):
+            label = search_label(current, mask, plies[i], options["node_budget"])
+            if label is not None:
+                labels[i] = label
+    return index, boards, keys, plies, moves, labels
+
+
+# ================================
+# Shard writer
+# ================================
+
+class ShardWriter:
+    """Buffers unseen positions and writes them out a shard at a time."""
+
+    def __init__(self, out_dir, settings, shard_size=DEFAULT_SHARD_SIZE):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.manifest_path = os.path.join(out_dir, SHARD_MANIFEST)
+        os.makedirs(out_dir, exist_ok=True)
+        for stray in glob.glob(os.path.join(out_dir, "*.tmp*")):
+            os.remove(stray)
+
+        self.seen = set()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+            previous = {name: self.manifest.get(name) for name in RUN_SETTINGS}
+            if previous != settings:
+                raise ValueError(f"{out_dir} was generated with different settings: {previous}")
+            for shard in self.manifest["shards"]:
+                self.seen.update(load_shard(os.path.join(out_dir, shard["file"]))["keys"].tolist())
+        else:
+            self.manifest = dict(settings, layout=LAYOUT_VERSION, games_done=0, positions=0, shards=[])
+        self.games_done = self.manifest["games_done"]
+        self._clear_buffer()
+
+    def _clear_buffer(self):
+        self.boards, self.keys, self.plies, self.moves, self.labels = [], [], [], [], []
+
+    def add(self, game):
+        index, boards, keys, plies, moves, labels = game
+        for i, key in enumerate(keys):
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            self.boards.append(boards[i])
+            self.keys.append(key)
+            self.plies.append(plies[i])
+            self.moves.append(moves[i])
+            self.labels.append(labels[i])
+        # Results arrive in game order, so every game up to this one is in hand
+        self.games_done = index + 1
+        if len(self.keys) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffer as one shard, then records it in the manifest."""
+        if self.keys:
+            name = f"shard-{len(self.manifest['shards']):05d}.npz"
+            tmp_path = os.path.join(self.out_dir, name + ".tmp.npz")
+            np.savez_compressed(
+                tmp_path,
+                boards=np.frombuffer(b"".join(self.boards), dtype=np.uint8).reshape(-1, len(UCI_BITS)),
+                labels=np.array(self.labels, dtype=np.int8),
+                ply=np.array(self.plies, dtype=np.uint8),
+                move=np.array(self.moves, dtype=np.int8),
+                keys=np.array(self.keys, dtype=np.uint64),
+            )
+            os.replace(tmp_path, os.path.join(self.out_dir, name))
+            self.manifest["shards"].append({"file": name, "positions": len(self.keys)})
+            self.manifest["positions"] += len(self.keys)
+            self._clear_buffer()
+        self.manifest["games_done"] = self.games_done
+        # The manifest is replaced last, so it never names a shard that is not on disk
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def build_tasks(agents, start, games, seed, options):
+    pairings = list(itertools.product(agents, repeat=2))
+    for index in range(start, games):
+        first, second = pairings[index % len(pairings)]
+        yield index, first, second, seed * 1_000_003 + index, options
+
+
+def generate(out_dir, agents, games, workers=None, seed=0, label="outcome", shard_size=DEFAULT_SHARD_SIZE,
+             opening_moves=DEFAULT_OPENING_MOVES, node_budget=DEFAULT_NODE_BUDGET, minimax_depth=3,
+             mcts_iterations=200):
+    """Plays games until `games` have been recorded in `out_dir`; returns the manifest."""
+    settings = {
+        "agents": list(agents), "seed": seed, "label": label, "opening_moves": opening_moves,
+        "minimax_depth": minimax_depth, "mcts_iterations": mcts_iterations,
+    }
+    options = dict(settings, minimax_time=None, node_budget=node_budget)
+    writer = ShardWriter(out_dir, settings, shard_size)
+    start_game = writer.games_done
+    if start_game:
+        print(f"Resuming after {start_game} games ({writer.manifest['positions']} positions on disk)")
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    played = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for block in range(start_game, games, BLOCK_GAMES):
+                tasks = list(build_tasks(agents, block, min(block + BLOCK_GAMES, games), seed, options))
+                chunksize = max(1, len(tasks) // (4 * workers))
+                for game in executor.map(play_selfplay_game, tasks, chunksize=chunksize):
+                    writer.add(game)
+                    played += 1
+                elapsed = time.perf_counter() - start
+                print(f"{writer.games_done}/{games} games, {len(writer.seen)} unique positions, "
+                      f"{played / elapsed:.1f} games/s")
+    finally:
+        # Everything buffered comes from finished games, so it is safe to keep
+        writer.flush()
+    return writer.manifest
+
+
+def main(argv=None):
+    from connect4.arena import AGENT_NAMES
+
+    parser = argparse.ArgumentParser(description="Generate self-play training data for ml_agent.")
+    parser.add_argument("--out", required=True, help="output directory (resumed if it already has shards)")
+    parser.add_argument("--agents", nargs="+", choices=AGENT_NAMES, default=["mcts", "minimax"])
+    parser.add_argument("--games", type=int, default=1000, help="total games, including ones already recorded")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", choices=("outcome", "search"), default="outcome")
+    parser.add_argument("--node-budget", type=int, default=DEFAULT_NODE_BUDGET,
+                        help="solver nodes per position for --label search")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="positions per shard")
+    parser.add_argument("--opening-moves", type=int, default=DEFAULT_OPENING_MOVES,
+                        help="random moves at the start of every game")
+    parser.add_argument("--minimax-depth", type=int, default=3)
+    parser.add_argument("--mcts-iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = generate(args.out, args.agents, args.games, args.workers, args.seed, args.label,
+                            args.shard_size, args.opening_moves, args.node_budget, args.minimax_depth,
+                            args.mcts_iterations)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{manifest['positions']} positions from {manifest['games_done']} games "
+          f"in {len(manifest['shards'])} shards under {args.out}")
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# test_ai_worker.py
+import time
+
+import pytest
+
+from connect4.ai_worker import AIMove
+from connect4.game_utils import create_board
+from connect4.agent_utils.minimax_agent import minimax_agent
+from connect4.agent_utils.mcts_agent import mcts_agent
+from connect4.agent_utils.solver import solver_agent
+
+
+def slow_minimax(board, player):
+    return minimax_agent(board, player, time_budget=30.0)
+
+
+def slow_fixed_depth(board, player):
+    return minimax_agent(board, player, depth=12)
+
+
+def slow_mcts(board, player):
+    return mcts_agent(board, player, time_budget=30.0)
+
+
+def slow_solver(board, player):
+    return solver_agent(board, player, time_budget=30.0)
+
+
+@pytest.mark.parametrize("agent", [slow_minimax, slow_fixed_depth, slow_mcts, slow_solver])
+def test_cancel_stops_the_search(agent):
+    move = AIMove(create_board(), agent, 1, agent.__name__)
+    time.sleep(0.3)
+    assert not move.stopped()
+    start = time.perf_counter()
+    move.cancel()
+    move.join(timeout=5.0)
+    assert move.stopped()
+    assert time.perf_counter() - start < 2.0
+    assert not move.done()
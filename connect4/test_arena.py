@@ -0,0 +1,49 @@
+# test_arena.py
+from connect4 import arena
+
+OPTIONS = {"minimax_depth": 1, "minimax_time": None, "mcts_iterations": 10}
+
+
+def test_tasks_alternate_first_move_and_follow_the_seed():
+    tasks = arena.build_tasks(["random", "smart", "minimax"], 4, 7, OPTIONS)
+    assert len(tasks) == 3 * 4
+    for pairing in range(3):
+        games = tasks[4 * pairing:4 * pairing + 4]
+        assert [first for first, _, _, _ in games[::2]] == [games[0][0]] * 2
+        assert [first for first, _, _, _ in games[1::2]] == [games[0][1]] * 2
+    # Every game gets its own seed, and the same seed gives the same tasks
+    assert len({seed for _, _, seed, _ in tasks}) == len(tasks)
+    assert arena.build_tasks(["random", "smart", "minimax"], 4, 7, OPTIONS) == tasks
+    assert arena.build_tasks(["random", "smart", "minimax"], 4, 8, OPTIONS) != tasks
+
+    # A game is decided by its task alone
+    task = ("random", "random", tasks[0][2], OPTIONS)
+    assert arena.play_game(task)[2] == arena.play_game(task)[2]
+    assert arena.play_game(task)[5] == []
+
+
+def test_one_sided_record_has_a_real_interval():
+    elo, low, high = arena.elo_interval(0, 0, 20)
+    assert low < elo < high < 0
+    assert high - low > 100
+    elo, low, high = arena.elo_interval(10, 0, 10)
+    assert abs(low + high) < 1e-9 and elo == 0
+
+    agents = ["random", "smart", "minimax"]
+    records = {("random", "smart"): [0, 0, 20], ("random", "minimax"): [0, 0, 20],
+               ("smart", "minimax"): [3, 2, 15]}
+    ratings = arena.fit_ratings(records, agents)
+    intervals = arena.rating_intervals(records, ratings)
+    for agent in agents:
+        low, high = intervals[agent]
+        assert low < ratings[agent] < high
+
+    # Without clean sweeps, more of the same games narrow the interval
+    records = {("random", "smart"): [2, 1, 7], ("random", "minimax"): [1, 2, 7],
+               ("smart", "minimax"): [3, 2, 5]}
+    widths = []
+    for scale in (1, 10):
+        more = {pair: [scale * n for n in record] for pair, record in records.items()}
+        low, high = arena.rating_intervals(more, arena.fit_ratings(more, agents))["smart"]
+        widths.append(high - low)
+    assert widths[1] < widths[0] / 2
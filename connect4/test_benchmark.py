@@ -0,0 +1,26 @@
+# test_benchmark.py
+import copy
+
+from connect4 import benchmark
+
+
+def test_corpus_is_fixed_by_its_seed():
+    corpus = benchmark.build_corpus()
+    assert benchmark.corpus_hash(corpus) == benchmark.corpus_hash(benchmark.build_corpus())
+    assert benchmark.corpus_hash(corpus) != benchmark.corpus_hash(benchmark.build_corpus(seed=1))
+    assert len(corpus) == len(benchmark.PHASES) * benchmark.POSITIONS_PER_PHASE
+    for phase, board, piece in corpus:
+        low, high = benchmark.PHASES[phase]
+        assert low <= sum(cell != 0 for row in board for cell in row) <= high
+
+
+def test_suite_runs_and_flags_regressions():
+    run = benchmark.run_suite(max_depth=2, repeat=1, only=["check_win", "minimax", "smart_agent"])
+    assert set(run["results"]) == {"check_win", "minimax_d1", "minimax_d2", "smart_agent"}
+    assert run["results"]["minimax_d2"]["nodes"] > run["results"]["minimax_d1"]["nodes"]
+    assert run["results"]["check_win"]["nodes"] is None
+
+    slower = copy.deepcopy(run)
+    slower["results"]["smart_agent"]["ops_per_sec"] /= 2
+    assert benchmark.compare(run, slower) == ["smart_agent"]
+    assert benchmark.compare(run, run) == []
@@ -0,0 +1,39 @@
+# test_evaluation.py
+import random
+
+import pytest
+
+from connect4.bitboard import board_from_position
+from connect4.lines import flatten, score_windows
+from connect4.agent_utils.incremental_eval import ScoredPosition
+from connect4.agent_utils.minimax_agent import evaluate_board
+
+
+def assert_matches_reference(pos):
+    board = board_from_position(pos)
+    cells = flatten(board)
+    for piece in (1, 2):
+        expected = evaluate_board(board, piece)
+        assert pos.score(piece) == expected
+        assert score_windows(cells, piece) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_scored_position_matches_evaluate_board(seed):
+    rng = random.Random(seed)
+    pos = ScoredPosition()
+    played = []
+    piece = 1
+    assert_matches_reference(pos)
+    for _ in range(120):
+        legal = pos.legal_moves()
+        # Mostly play, sometimes take moves back, so undo is covered mid-game too
+        if played and (not legal or rng.random() < 0.3):
+            col, piece = played.pop()
+            pos.undo(col)
+        else:
+            col = rng.choice(legal)
+            pos.play(col, piece)
+            played.append((col, piece))
+            piece = 3 - piece
+        assert_matches_reference(pos)
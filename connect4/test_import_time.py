@@ -0,0 +1,53 @@
+# test_import_time.py
+import sys
+import json
+import subprocess
+
+# Modules batch workers need: the rules, the bitboard engine and the search agents
+CORE_MODULES = [
+    "connect4.constants",
+    "connect4.bitboard",
+    "connect4.lines",
+    "connect4.game_utils",
+    "connect4.game_help",
+    "connect4.agent_utils.random_agent",
+    "connect4.agent_utils.smart_agent",
+    "connect4.agent_utils.minimax_agent",
+    "connect4.arena",
+]
+
+# None of these may be pulled in by the core
+HEAVY_MODULES = ["pygame", "sklearn", "pandas", "numpy", "joblib"]
+
+# Seconds for a fresh interpreter to import all of CORE_MODULES
+IMPORT_BUDGET = 0.5
+
+PROBE = """
+import sys, json, time, importlib
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_probe():
+    code = PROBE.format(modules=CORE_MODULES, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def test_core_import_skips_gui_and_ml():
+    assert run_probe()["loaded"] == []
+
+
+def test_core_import_time_budget():
+    # Best of three to keep a cold disk cache from failing the check
+    elapsed = min(run_probe()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, f"core import took {elapsed:.3f}s (budget {IMPORT_BUDGET}s)"
+
+
+if __name__ == "__main__":
+    result = run_probe()
+    print(f"Core import: {result['elapsed'] * 1000:.1f} ms, heavy modules loaded: {result['loaded'] or 'none'}")
@@ -0,0 +1,50 @@
+# test_instrumentation.py
+import csv
+import json
+
+import pytest
+
+from connect4 import instrumentation
+from connect4.agent_utils.minimax_agent import minimax_agent
+from connect4.agent_utils.parallel_search import sample_positions
+from connect4.agent_utils.transposition_table import TranspositionTable
+
+
+def record_moves(path, count=3):
+    """Plays `count` fixed-depth minimax moves with a recorder on `path`; returns their records."""
+    instrumentation.enable(str(path))
+    try:
+        records = []
+        # Past the opening book, so every move is searched
+        for board, player in sample_positions(count, plies=(10, 12), seed=1):
+            stats = instrumentation.begin_move("minimax", player, board)
+            col = minimax_agent(board, player, depth=3, tt=TranspositionTable(1 << 16))
+            records.append(instrumentation.end_move(stats, col))
+    finally:
+        instrumentation.disable()
+    return records
+
+
+def test_json_lines_round_trip(tmp_path):
+    path = tmp_path / "stats.jsonl"
+    records = record_moves(path)
+    assert all(record["nodes"] > 0 and record["depth"] == 3 for record in records)
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == records
+
+
+def test_csv_round_trip(tmp_path):
+    path = tmp_path / "stats.csv"
+    records = record_moves(path, 2)
+    # A second run appends rows under the same header
+    records += record_moves(path, 1)
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(records)
+    for row, record in zip(rows, records):
+        assert tuple(row) == instrumentation.FIELDS
+        assert row["agent"] == "minimax"
+        for field in ("player", "ply", "column", "depth", "nodes", "leaf_evals", "tt_probes", "tt_hits"):
+            assert int(row[field]) == record[field]
+        assert float(row["move_time"]) == pytest.approx(record["move_time"])
+        assert [int(n) for n in row["cutoffs_by_ply"].split()] == record["cutoffs_by_ply"]
@@ -1,4 +1,147 @@
-from connect4.agents.ml_agent import train_ml_agent
+# test_ml_agent.py
+import random
 
-print("Testing the ml_agent import...")
-train_ml_agent('connect4_dataset/connect-4.data', 'connect4_dataset/connect-4.names')
+import pytest
+
+pytest.importorskip("sklearn")
+
+from connect4.agent_utils import ml_agent
+from connect4.game_utils import create_board, valid_move
+
+# Rows of a synthetic dataset in the UCI connect-4.data layout
+ROWS = 200
+
+
+def write_dataset(path, rows=ROWS, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for _ in range(rows):
+            cells = [rng.choice("xob") for _ in range(42)]
+            f.write(",".join(cells) + "," + rng.choice(["win", "loss", "draw"]) + "\n")
+
+
+def write_centre_dataset(path, rows=ROWS, seed=0):
+    """Random rows where the first player wins exactly when it holds d1, the bottom centre cell."""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for _ in range(rows):
+            cells = [rng.choice("xob") for _ in range(42)]
+            # d1 is the first cell of the fourth column in the UCI layout
+            f.write(",".join(cells) + "," + ("win" if cells[18] == "x" else "loss") + "\n")
+
+
+def test_train_model_and_pick_a_legal_move(tmp_path, monkeypatch):
+    dataset = tmp_path / "connect-4.data"
+    write_dataset(dataset)
+    model_path = tmp_path / "model.pkl"
+
+    # Keep the test quick and leave the shipped model file alone
+    monkeypatch.setitem(ml_agent.MODEL_PARAMS, "n_estimators", 10)
+    save = ml_agent.save_model_artifact
+    monkeypatch.setattr(ml_agent, "save_model_artifact",
+                        lambda model, fingerprint: save(model, fingerprint, str(model_path)))
+
+    model = ml_agent.train_model(str(dataset), "connect-4.names")
+    assert model_path.exists()
+
+    board = create_board()
+    col = ml_agent.ml_agent(board, 1, model)
+    assert valid_move(board, col)
+
+    # A changed dataset invalidates the artifact; a missing one does not
+    assert ml_agent.load_cached_model(str(dataset), str(model_path)) is not None
+    write_dataset(dataset, seed=1)
+    assert ml_agent.load_cached_model(str(dataset), str(model_path)) is None
+    dataset.unlink()
+    assert ml_agent.load_cached_model(str(dataset), str(model_path)) is not None
+
+
+def test_flat_forest_matches_sklearn(tmp_path, monkeypatch):
+    import numpy as np
+    from connect4.benchmark import build_corpus
+    from connect4.agent_utils.flat_forest import FlatForest, export_forest
+
+    dataset = tmp_path / "connect-4.data"
+    write_dataset(dataset)
+    monkeypatch.setitem(ml_agent.MODEL_PARAMS, "n_estimators", 10)
+    monkeypatch.setattr(ml_agent, "save_model_artifact", lambda model, fingerprint: None)
+    model = ml_agent.train_model(str(dataset), "connect-4.names")
+
+    # Boards from real play, encoded the way ml_agent encodes them
+    X = ml_agent.encode_boards([board for _, board, _ in build_corpus()])
+    assert (X != 0).any(axis=1).all()
+    flat = export_forest(model)
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X))
+
+    path = tmp_path / "forest.npz"
+    flat.save(path)
+    np.testing.assert_allclose(FlatForest.load(path).predict_proba(X), model.predict_proba(X))
+
+
+def test_streaming_training_resumes_after_interruption(tmp_path, monkeypatch):
+    import numpy as np
+    from connect4.agent_utils import ml_streaming
+
+    dataset = tmp_path / "connect-4.data"
+    write_dataset(dataset)
+
+    def train(name):
+        path = str(tmp_path / name)
+        return ml_streaming.train_streaming(str(dataset), epochs=2, chunk_size=32, checkpoint_every=1,
+                                            model_path=path, checkpoint_path=path + ".ckpt")
+
+    expected = train("straight.pkl")
+
+    # Stop partway through the first epoch, then run again
+    chunks = ml_streaming.iter_chunks
+
+    def interrupted(path, size):
+        for i, chunk in enumerate(chunks(path, size)):
+            if i == 3:
+                raise KeyboardInterrupt
+            yield chunk
+
+    monkeypatch.setattr(ml_streaming, "iter_chunks", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        train("resumed.pkl")
+    assert (tmp_path / "resumed.pkl.ckpt").exists()
+    monkeypatch.setattr(ml_streaming, "iter_chunks", chunks)
+    model = train("resumed.pkl")
+
+    assert not (tmp_path / "resumed.pkl.ckpt").exists()
+    np.testing.assert_allclose(model[-1].coef_, expected[-1].coef_)
+    board = create_board()
+    assert valid_move(board, ml_agent.ml_agent(board, 1, model))
+
+
+def test_priors_follow_the_board(tmp_path, monkeypatch):
+    from connect4.agent_utils.mcts_agent import move_priors
+
+    dataset = tmp_path / "connect-4.data"
+    write_centre_dataset(dataset, rows=600)
+    monkeypatch.setitem(ml_agent.MODEL_PARAMS, "n_estimators", 20)
+    monkeypatch.setattr(ml_agent, "save_model_artifact", lambda model, fingerprint: None)
+    model = ml_agent.train_model(str(dataset), "connect-4.names")
+
+    board = create_board()
+    board[5][0] = 2
+    priors = move_priors(board, 1, model)
+    assert max(priors, key=priors.get) == 3
+    assert len(set(priors.values())) > 1
+    assert ml_agent.ml_agent(board, 1, model) == 3
+
+
+def test_streaming_model_moves_depend_on_the_board(tmp_path):
+    from connect4.agent_utils import ml_streaming
+
+    dataset = tmp_path / "connect-4.data"
+    write_centre_dataset(dataset, rows=2000)
+    path = str(tmp_path / "sgd.pkl")
+    model = ml_streaming.train_streaming(str(dataset), epochs=5, chunk_size=256, model_path=path,
+                                         checkpoint_path=path + ".ckpt")
+
+    board = create_board()
+    assert ml_agent.ml_agent(board, 1, model) == 3
+    # With d1 gone the model has nothing to prefer, and the choice moves
+    board[5][3] = 2
+    assert ml_agent.ml_agent(board, 1, model) != 3
@@ -0,0 +1,22 @@
+# test_parallel_search.py
+from connect4.bitboard import position_from_board
+from connect4.agent_utils.incremental_eval import ScoredPosition
+from connect4.agent_utils.minimax_agent import search_root
+from connect4.agent_utils.move_ordering import MoveOrderer
+from connect4.agent_utils.parallel_search import parallel_search_root, sample_positions, shutdown_pool
+from connect4.agent_utils.transposition_table import TranspositionTable
+
+DEPTH = 4
+
+
+def test_matches_sequential_search():
+    try:
+        for board, player in sample_positions(6, seed=3):
+            pos = ScoredPosition.from_position(position_from_board(board))
+            expected = search_root(pos, DEPTH, player, TranspositionTable(1 << 16), orderer=MoveOrderer())
+            for workers in (1, 3):
+                col, score, nodes = parallel_search_root(board, DEPTH, player, workers)
+                assert (col, score) == expected
+                assert nodes > 0
+    finally:
+        shutdown_pool()
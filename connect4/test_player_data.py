@@ -0,0 +1,63 @@
+# test_player_data.py
+import json
+import multiprocessing
+import sqlite3
+
+from connect4.player_data import ScoreStore
+
+WRITERS = 4
+RESULTS_PER_WRITER = 50
+
+
+def read_scores(db_file):
+    with sqlite3.connect(db_file) as conn:
+        return dict(conn.execute("SELECT name, wins FROM players").fetchall())
+
+
+def record_results(db_file):
+    # Never closed: the process's exit hook has to write the last batch
+    store = ScoreStore(str(db_file), data_file=None, batch_size=7, flush_interval=60)
+    for i in range(RESULTS_PER_WRITER):
+        store.record("ai" if i % 2 else "human", 1 if i % 5 else 0.5)
+
+
+def test_migrates_the_json_file_once(tmp_path):
+    data_file = tmp_path / "player_data.json"
+    data_file.write_text(json.dumps({"alice": {"wins": 3}, "bob": {"wins": 1.5}}))
+    db_file = tmp_path / "player_data.db"
+
+    store = ScoreStore(str(db_file), str(data_file))
+    store.record("alice", 1)
+    assert store.leaderboard() == [("alice", 4), ("bob", 1.5)]
+    store.close()
+
+    # A second store on the same database must not import the file again
+    store = ScoreStore(str(db_file), str(data_file))
+    assert store.leaderboard() == [("alice", 4), ("bob", 1.5)]
+    store.close()
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    db_file = tmp_path / "player_data.db"
+    writers = [multiprocessing.Process(target=record_results, args=(db_file,)) for _ in range(WRITERS)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert all(writer.exitcode == 0 for writer in writers)
+
+    wins = [1 if i % 5 else 0.5 for i in range(RESULTS_PER_WRITER)]
+    assert read_scores(db_file) == {
+        "ai": WRITERS * sum(wins[1::2]),
+        "human": WRITERS * sum(wins[::2]),
+    }
+
+
+def test_pending_results_are_written_on_close(tmp_path):
+    db_file = tmp_path / "player_data.db"
+    store = ScoreStore(str(db_file), data_file=None, batch_size=100, flush_interval=60)
+    for _ in range(5):
+        store.record("carol", 1)
+    assert read_scores(db_file) == {}
+    store.close()
+    assert read_scores(db_file) == {"carol": 5}
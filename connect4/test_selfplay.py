@@ -0,0 +1,56 @@
+# test_selfplay.py
+import os
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from connect4 import selfplay
+from connect4.dataset import load_shard
+
+GAMES = 24
+
+
+def read_run(out_dir):
+    """The run's manifest and the keys of every shard it lists, in order."""
+    with open(os.path.join(out_dir, selfplay.SHARD_MANIFEST)) as f:
+        manifest = json.load(f)
+    keys = []
+    for shard in manifest["shards"]:
+        keys.extend(load_shard(os.path.join(out_dir, shard["file"]))["keys"].tolist())
+    return manifest, keys
+
+
+def run(out_dir):
+    return selfplay.generate(str(out_dir), ["random", "smart"], GAMES, workers=2, seed=5, shard_size=40)
+
+
+def test_resume_continues_without_duplicates(tmp_path, monkeypatch):
+    run(tmp_path / "straight")
+    straight, straight_keys = read_run(tmp_path / "straight")
+
+    # Stop after a few games, as Ctrl+C would
+    add = selfplay.ShardWriter.add
+
+    def interrupted(writer, game):
+        if game[0] == 9:
+            raise KeyboardInterrupt
+        add(writer, game)
+
+    monkeypatch.setattr(selfplay.ShardWriter, "add", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        run(tmp_path / "resumed")
+    monkeypatch.setattr(selfplay.ShardWriter, "add", add)
+    partial, partial_keys = read_run(tmp_path / "resumed")
+    assert partial["games_done"] == 9 and partial_keys
+    run(tmp_path / "resumed")
+    resumed, keys = read_run(tmp_path / "resumed")
+
+    assert resumed["games_done"] == straight["games_done"] == GAMES
+    assert len(keys) == len(set(keys)) == resumed["positions"]
+    assert keys[:len(partial_keys)] == partial_keys
+    assert sorted(keys) == sorted(straight_keys)
+    files = [shard["file"] for shard in resumed["shards"]]
+    assert len(files) == len(set(files))
+    assert sorted(os.listdir(tmp_path / "resumed")) == sorted(files + [selfplay.SHARD_MANIFEST])
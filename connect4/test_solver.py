@@ -0,0 +1,168 @@
+# test_solver.py
+import random
+
+import pytest
+
+from connect4.bitboard import Position, board_from_position
+from connect4.agent_utils import opening_book, solver as solver_module
+from connect4.agent_utils.solver import CELL_COUNT, Solver, solver_agent
+from connect4.agent_utils.opening_book import OpeningBook, UCI_BITS, book_move, import_uci, write_book
+
+# Endgames are compared with a brute-force search, so they must stay small
+EMPTY_CELLS = 8
+
+
+def play_moves(cols):
+    pos = Position()
+    for i, col in enumerate(cols):
+        pos.play(col, 1 + i % 2)
+    return pos
+
+
+def reference_score(pos, piece):
+    """Plain negamax over every continuation, scored like the solver."""
+    legal = pos.legal_moves()
+    if not legal:
+        return 0
+    if any(pos.is_winning_move(col, piece) for col in legal):
+        return (CELL_COUNT + 1 - pos.moves) // 2
+    best = -CELL_COUNT
+    for col in legal:
+        pos.play(col, piece)
+        best = max(best, -reference_score(pos, 3 - piece))
+        pos.undo(col)
+    return best
+
+
+def random_endgame(rng):
+    """A position with EMPTY_CELLS empty cells that nobody has won yet."""
+    while True:
+        pos = Position()
+        piece = 1
+        while pos.moves < CELL_COUNT - EMPTY_CELLS:
+            col = rng.choice(pos.legal_moves())
+            if pos.is_winning_move(col, piece):
+                break
+            pos.play(col, piece)
+            piece = 3 - piece
+        else:
+            return pos, piece
+
+
+def test_immediate_win():
+    # First player has three stacked in the centre and is to move
+    pos = play_moves([3, 2, 3, 2, 3, 4])
+    result = Solver(tt_size=1 << 16).solve(pos, 1)
+    assert result["score"] == (CELL_COUNT + 1 - 6) // 2
+    assert result["result"] == "win"
+    assert result["distance"] == 1
+
+
+def test_open_three_cannot_be_blocked():
+    # First player has b1-c1-d1 with a1 and e1 open; second player to move
+    pos = play_moves([1, 1, 2, 2, 3])
+    solver = Solver(tt_size=1 << 16)
+    result = solver.solve(pos, 2)
+    assert result["score"] == -18
+    assert result["result"] == "loss"
+    assert result["distance"] == 2
+    assert all(score is None or score < 0 for score in solver.analyze(pos, 2))
+    assert solver.solve(pos, 2, weak=True)["score"] == -1
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_endgames_match_brute_force(seed):
+    pos, piece = random_endgame(random.Random(seed))
+    solver = Solver(tt_size=1 << 16)
+    expected = reference_score(pos, piece)
+    assert solver.solve(pos, piece)["score"] == expected
+    assert solver.solve(pos, piece, weak=True)["score"] == (expected > 0) - (expected < 0)
+
+    scores = solver.analyze(pos, piece)
+    for col in range(7):
+        if not pos.can_play(col):
+            assert scores[col] is None
+            continue
+        if pos.is_winning_move(col, piece):
+            assert scores[col] == (CELL_COUNT + 1 - pos.moves) // 2
+            continue
+        pos.play(col, piece)
+        assert scores[col] == -reference_score(pos, 3 - piece)
+        pos.undo(col)
+
+
+def test_solver_agent_plays_the_solved_move(monkeypatch):
+    monkeypatch.setattr(opening_book, "get_book", lambda *args, **kwargs: None)
+    monkeypatch.setattr(solver_module, "minimax_agent",
+                        lambda *args, **kwargs: pytest.fail("fell back to minimax"))
+    rng = random.Random(0)
+    for _ in range(5):
+        pos, piece = random_endgame(rng)
+        expected = Solver(tt_size=1 << 16).best_move(pos, piece, weak=True)
+        assert solver_agent(board_from_position(pos), piece, time_budget=10.0) == expected
+
+
+def write_uci(path, rows):
+    """Writes (position, first player's result) rows in the connect-4.data layout."""
+    with open(path, "w") as f:
+        for pos, label in rows:
+            first, second = pos.boards
+            cells = ["x" if first >> bit & 1 else "o" if second >> bit & 1 else "b" for bit in UCI_BITS]
+            f.write(",".join(cells) + "," + label + "\n")
+
+
+def build_test_book(tmp_path, labels):
+    """A book of the ply-8 replies to a ply-7 position, labelled per column."""
+    pos = play_moves([3, 2, 3, 2, 2, 3, 4])
+    rows = []
+    for col, label in labels.items():
+        pos.play(col, 2)
+        rows.append((pos.copy(), label))
+        pos.undo(col)
+    write_uci(tmp_path / "connect-4.data", rows)
+    records, max_ply = import_uci(str(tmp_path / "connect-4.data"))
+    assert max_ply == 8
+    write_book(records, max_ply, str(tmp_path / "book.bin"))
+    return pos, OpeningBook(str(tmp_path / "book.bin"))
+
+
+def test_book_move_plays_the_winning_reply(tmp_path):
+    labels = {col: "draw" for col in range(7)}
+    labels[5] = "loss"
+    pos, book = build_test_book(tmp_path, labels)
+    assert book_move(pos, 2, book) == 5
+    solver = Solver(tt_size=1 << 16, book=book)
+    assert solver.solve(pos, 2, weak=True)["score"] == 1
+    assert solver.nodes <= 7
+    book.close()
+
+
+def test_book_move_needs_every_reply(tmp_path):
+    pos, book = build_test_book(tmp_path, {col: "draw" for col in range(7)})
+    assert book_move(pos, 2, book) == 3
+    book.close()
+
+    pos, book = build_test_book(tmp_path, {col: "draw" for col in range(6)})
+    assert book_move(pos, 2, book) is None
+    book.close()
+
+
+def test_book_finds_mirrored_positions(tmp_path):
+    labels = {col: "draw" for col in range(7)}
+    labels[5] = "loss"
+    labels[0] = "win"
+    pos, book = build_test_book(tmp_path, labels)
+    scores = {"win": 1, "draw": 0, "loss": -1}
+    mirrored = play_moves([6 - col for col in [3, 2, 3, 2, 2, 3, 4]])
+    for col, label in labels.items():
+        pos.play(col, 2)
+        mirrored.play(6 - col, 2)
+        # The first player is to move after the reply, and the label is theirs
+        assert book.lookup_position(pos, 1) == scores[label]
+        assert book.lookup(mirrored.boards[0], mirrored.mask) == scores[label]
+        pos.undo(col)
+        mirrored.undo(6 - col)
+    assert book_move(mirrored, 2, book) == 1
+    # A ply-8 position the book never saw
+    assert book.lookup_position(play_moves([0, 0, 0, 1, 1, 1, 6, 6]), 1) is None
+    book.close()